@@ -0,0 +1,62 @@
+"""Сравнение синхронного (WSGI) и асинхронного (ASGI) API под нагрузкой.
+
+Запуск серверов (в отдельных терминалах, с одной и той же базой)::
+
+    gunicorn shoplist.wsgi -b 127.0.0.1:8000 -w 1 --threads 8
+    uvicorn shoplist.asgi:application --port 8001 --workers 1
+
+Затем войти на сайт, взять значение cookie ``sessionid`` и выполнить::
+
+    python -m benchmarks.async_vs_wsgi --session <sessionid> \\
+        --concurrency 1,10,50,200 --requests 2000 --out async_vs_wsgi.json
+"""
+
+import argparse
+import asyncio
+import json
+
+from .http_load import run_load
+
+#: Пары эндпоинтов: синхронный (WSGI) и асинхронный (ASGI) вариант.
+ENDPOINTS = {
+    "list": ("/products/api/products/", "/products/api/async/products/"),
+    "search": ("/products/api/products/?q=телефон", "/products/api/async/search/?q=телефон"),
+    "detail": ("/products/api/products/{pk}/", "/products/api/async/products/{pk}/"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wsgi", default="http://127.0.0.1:8000")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8001")
+    parser.add_argument("--session", required=True, help="Значение cookie sessionid.")
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--pk", type=int, default=1, help="id товара для detail.")
+    parser.add_argument("--out", help="Файл для результатов в JSON.")
+    args = parser.parse_args(argv)
+
+    headers = {"Cookie": f"sessionid={args.session}"}
+    results = []
+    for name, (sync_path, async_path) in ENDPOINTS.items():
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            for server, base, path in (("wsgi", args.wsgi, sync_path), ("asgi", args.asgi, async_path)):
+                url = base + path.format(pk=args.pk)
+                result = asyncio.run(run_load(url, concurrency, args.requests, headers))
+                result.update(endpoint=name, server=server)
+                results.append(result)
+                print(
+                    f"{name:7} {server:5} c={concurrency:<4} "
+                    f"{result['throughput_rps']} rps  p50={result['p50_ms']:.1f}  "
+                    f"p95={result['p95_ms']:.1f}  p99={result['p99_ms']:.1f} ms  "
+                    f"errors={result['errors']}"
+                    if result["p50_ms"] is not None
+                    else f"{name:7} {server:5} c={concurrency:<4} все запросы с ошибкой"
+                )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Генератор синтетического каталога для нагрузочных тестов.
+
+Магазины и товары с правдоподобными русскими названиями, описаниями и
+ценами создаются через ``bulk_create`` порциями в одной транзакции на
+порцию; поисковый индекс заполняется теми же порциями::
+
+    SHOPLIST_DB_NAME=bench.sqlite3 python -m benchmarks.catalog --products 100000 --shops 50
+
+Генерация детерминирована: одинаковый ``--seed`` даёт одинаковый каталог.
+Повторный запуск на базе с каталогом дополняет его: недостающие магазины
+и артикулы ``BENCH-…`` нумеруются после уже существующих.
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal
+
+# Существительное, род и базовая цена, ₽
+NOUNS = [
+    ("телефон", "m", 15000),
+    ("смартфон", "m", 25000),
+    ("ноутбук", "m", 60000),
+    ("планшет", "m", 30000),
+    ("чайник", "m", 3000),
+    ("пылесос", "m", 12000),
+    ("холодильник", "m", 55000),
+    ("рюкзак", "m", 4000),
+    ("монитор", "m", 20000),
+    ("кофеварка", "f", 9000),
+    ("лампа", "f", 2500),
+    ("куртка", "f", 8000),
+    ("клавиатура", "f", 3500),
+    ("мультиварка", "f", 7000),
+    ("сковорода", "f", 2800),
+    ("футболка", "f", 1500),
+    ("кресло", "n", 14000),
+    ("зеркало", "n", 5000),
+    ("одеяло", "n", 4500),
+    ("наушники", "p", 6000),
+    ("кроссовки", "p", 7500),
+    ("часы", "p", 11000),
+    ("весы", "p", 2200),
+]
+
+# Прилагательное в мужском, женском, среднем роде и во множественном числе
+ADJECTIVES = [
+    ("беспроводной", "беспроводная", "беспроводное", "беспроводные"),
+    ("компактный", "компактная", "компактное", "компактные"),
+    ("чёрный", "чёрная", "чёрное", "чёрные"),
+    ("белый", "белая", "белое", "белые"),
+    ("складной", "складная", "складное", "складные"),
+    ("детский", "детская", "детское", "детские"),
+    ("умный", "умная", "умное", "умные"),
+    ("лёгкий", "лёгкая", "лёгкое", "лёгкие"),
+    ("новый", "новая", "новое", "новые"),
+    ("прочный", "прочная", "прочное", "прочные"),
+]
+GENDERS = {"m": 0, "f": 1, "n": 2, "p": 3}
+
+BRANDS = [
+    "Samsung", "Xiaomi", "Bosch", "Philips", "Tefal", "Sony", "Lenovo", "Redmond",
+    "Горизонт", "Бирюса", "Polaris", "Витязь", "Nike", "Атлант", "Скиф",
+]
+
+FEATURES = [
+    "гарантия 2 года",
+    "доставка за 1 день",
+    "корпус из алюминия",
+    "энергопотребление класса A++",
+    "работает до 12 часов без подзарядки",
+    "подходит для подарка",
+    "в комплекте чехол",
+    "русскоязычная инструкция",
+    "можно мыть в посудомоечной машине",
+]
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург", "Самара"]
+STREETS = ["Ленина", "Мира", "Советская", "Гагарина", "Пушкина", "Садовая", "Лесная"]
+SHOP_NAMES = ["Техносила", "Электрон", "Домовой", "Уют", "Спектр", "Планета", "Гранд", "Каскад"]
+
+
+SKU_PREFIX = "BENCH-"
+
+
+def shop_rows(count, rng, start=0):
+    """Несохранённые магазины с номерами после ``start``."""
+    from products.models import Shop
+
+    return [
+        Shop(
+            name=f"{rng.choice(SHOP_NAMES)} №{number}",
+            address=f"г. {rng.choice(CITIES)}, ул. {rng.choice(STREETS)}, {rng.randint(1, 150)}",
+        )
+        for number in range(start + 1, count + 1)
+    ]
+
+
+def last_sku_number():
+    """Номер последнего сгенерированного артикула (0 — товаров ещё нет)."""
+    from products.models import Product
+
+    sku = (
+        Product.objects.filter(sku__startswith=SKU_PREFIX)
+        .order_by("-sku")
+        .values_list("sku", flat=True)
+        .first()
+    )
+    return int(sku[len(SKU_PREFIX):]) if sku else 0
+
+
+def product_row(number, shop_ids, rng):
+    """Несохранённый товар со случайными названием, описанием и ценой."""
+    from products.models import Product
+
+    noun, gender, base_price = rng.choice(NOUNS)
+    adjective = rng.choice(ADJECTIVES)[GENDERS[gender]]
+    brand = rng.choice(BRANDS)
+    model = f"{rng.choice('ABCDKMSX')}{rng.randint(10, 999)}"
+    features = rng.sample(FEATURES, 2)
+    price = Decimal(base_price * rng.uniform(0.6, 1.8)).quantize(Decimal("0.01"))
+    return Product(
+        sku=f"{SKU_PREFIX}{number:08d}",
+        name=f"{adjective.capitalize()} {noun} {brand} {model}",
+        description=f"{noun.capitalize()} {brand} {model}: {features[0]}, {features[1]}.",
+        price=price,
+        shop_id=rng.choice(shop_ids),
+    )
+
+
+def generate_catalog(products, shops, batch_size=5000, seed=0, progress=None):
+    """Добавляет ``products`` товаров и доводит число магазинов до ``shops``.
+
+    Существующие магазины используются повторно, а артикулы новых
+    товаров продолжают нумерацию. Возвращает время генерации, с.
+    """
+    from django.db import transaction
+
+    from products import facets, search
+    from products.cache import bump_catalog_version
+    from products.models import Product, Shop
+
+    start = last_sku_number()
+    # Дополнение получает свою последовательность, а не повтор первых товаров
+    rng = random.Random(seed if not start else f"{seed}:{start}")
+    started = time.monotonic()
+    Shop.objects.bulk_create(
+        shop_rows(shops, rng, start=Shop.objects.count()), batch_size=batch_size
+    )
+    shop_ids = list(Shop.objects.values_list("id", flat=True))
+    created = 0
+    while created < products:
+        size = min(batch_size, products - created)
+        batch = [product_row(start + created + i + 1, shop_ids, rng) for i in range(size)]
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+            search.index_rows((p.pk, p.name, p.description) for p in batch)
+        created += size
+        if progress:
+            progress(created)
+    facets.recount_product_counts()
+    bump_catalog_version()
+    return time.monotonic() - started
+
+
+def main(argv=None):
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    call_command("migrate", verbosity=0)
+    elapsed = generate_catalog(
+        args.products,
+        args.shops,
+        args.batch_size,
+        args.seed,
+        progress=lambda created: print(f"\rТоваров: {created}", end="", flush=True),
+    )
+    print(f"\nГотово за {elapsed:.1f} с ({args.products / max(elapsed, 1e-9):.0f} товаров/с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Простой генератор HTTP-нагрузки на asyncio (без внешних зависимостей).
+
+Каждый запрос открывает отдельное соединение, поэтому число
+одновременных клиентов равно ``concurrency``.
+"""
+
+import asyncio
+import statistics
+import time
+from urllib.parse import quote, urlsplit
+
+
+def percentile(values, q):
+    """Перцентиль ``q`` (0–100) по отсортированному списку."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def fetch(url, headers=None):
+    """Выполняет GET и возвращает ``(статус, число байт тела)``."""
+    parts = urlsplit(url)
+    path = quote(parts.path + (f"?{parts.query}" if parts.query else ""), safe="/?=&%")
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = data.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1]) if head else 0
+    return status, len(body)
+
+
+async def run_load(url, concurrency, total, headers=None):
+    """Выполняет ``total`` запросов силами ``concurrency`` клиентов."""
+    latencies, errors = [], 0
+    remaining = total
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status, _ = await fetch(url, headers)
+            except OSError:
+                errors += 1
+                continue
+            if status != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
@@ -0,0 +1,226 @@
+"""Сценарии нагрузки на настоящие URL каталога и сравнение размеров каталога.
+
+Запросы выполняются в процессе через тестовый клиент Django, поэтому для
+каждого запроса известны время и число SQL-запросов. Для каждого размера
+каталога создаётся (или переиспользуется) отдельная база SQLite::
+
+    python -m benchmarks.scenarios --sizes 1000,100000,1000000 \\
+        --requests 200 --out bench.json
+
+Сценарии: ``list``, ``list_deep`` (страница в середине каталога),
+``list_deep_cursor``, ``list_more`` (подгрузка карточек при прокрутке),
+``search``, ``suggest`` (подсказки по началу слова), ``shop``, ``detail``, ``create``, ``update``. По каждому — p50/p95/p99, пропускная способность и число
+SQL-запросов на запрос. Результаты разных прогонов сравниваются по JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from .http_load import percentile
+
+SCENARIOS = [
+    "list",
+    "list_deep",
+    "list_deep_cursor",
+    "list_more",
+    "search",
+    "suggest",
+    "shop",
+    "detail",
+    "create",
+    "update",
+]
+
+SEARCH_TERMS = ["телефон", "чайник", "беспроводные наушники", "Samsung", "кресло", "лампа"]
+
+
+class Catalog:
+    """Сведения о каталоге, нужные сценариям (id, магазины, число товаров)."""
+
+    def __init__(self):
+        from products.models import Product, Shop
+
+        self.count = Product.objects.count()
+        self.shop_ids = list(Shop.objects.values_list("id", flat=True))
+        bounds = Product.objects.order_by("id").values_list("id", flat=True)
+        self.min_id = bounds.first()
+        self.max_id = bounds.last()
+
+
+def build_request(name, catalog, rng):
+    """``(метод, url, данные, настройки)`` для одного запроса сценария."""
+    from django.urls import reverse
+
+    from products.pagination import AFTER, encode_cursor
+
+    if name == "list":
+        return "get", reverse("products"), None, {}
+    if name == "list_deep":
+        pages = max(1, catalog.count // 6)
+        page = rng.randint(pages // 2, max(pages // 2, pages - 1))
+        return "get", f"{reverse('products')}?page={page}", None, {}
+    if name == "list_deep_cursor":
+        cursor = encode_cursor(AFTER, [rng.randint(catalog.min_id, catalog.max_id)])
+        return (
+            "get",
+            f"{reverse('products')}?cursor={cursor}",
+            None,
+            {"PRODUCT_LIST_PAGINATION": "cursor"},
+        )
+    if name == "list_more":
+        cursor = encode_cursor(AFTER, [rng.randint(catalog.min_id, catalog.max_id)])
+        return "get", f"{reverse('product_grid')}?cursor={cursor}", None, {}
+    if name == "search":
+        return "get", f"{reverse('products')}?q={rng.choice(SEARCH_TERMS)}", None, {}
+    if name == "suggest":
+        prefix = rng.choice(SEARCH_TERMS)[: rng.randint(2, 5)]
+        return "get", f"{reverse('api_suggest')}?q={prefix}", None, {}
+    if name == "shop":
+        return "get", f"{reverse('products')}?shop={rng.choice(catalog.shop_ids)}", None, {}
+    if name == "detail":
+        pk = rng.randint(catalog.min_id, catalog.max_id)
+        return "get", reverse("product_detail", args=[pk]), None, {}
+    data = {
+        "name": f"Тестовый товар {rng.randint(1, 10**6)}",
+        "description": "Создан нагрузочным тестом",
+        "price": f"{rng.randint(100, 100000)}.00",
+        "shop": rng.choice(catalog.shop_ids),
+    }
+    if name == "create":
+        return "post", reverse("product_add"), data, {}
+    pk = rng.randint(catalog.min_id, catalog.max_id)
+    return "post", reverse("product_edit", args=[pk]), data, {}
+
+
+def run_scenario(client, name, catalog, requests, rng, cold=False):
+    """Выполняет ``requests`` запросов сценария и возвращает сводку."""
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        method, url, data, overrides = build_request(name, catalog, rng)
+        if cold:
+            cache.clear()
+        with override_settings(**overrides), CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            latency = time.perf_counter() - request_started
+        if response.status_code not in (200, 302):
+            errors += 1
+            continue
+        latencies.append(latency * 1000)
+        queries.append(len(captured))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else None,
+        "queries_max": max(queries, default=None),
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def run_size(args):
+    """Прогон всех сценариев на одной базе (в дочернем процессе)."""
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+    from django.test import Client
+
+    from products.models import CustomUser, Product
+
+    from .catalog import generate_catalog
+
+    call_command("migrate", verbosity=0)
+    generated = None
+    if Product.objects.count() < args.products:
+        generated = generate_catalog(
+            args.products - Product.objects.count(), args.shops, seed=args.seed
+        )
+    manager, _ = CustomUser.objects.get_or_create(
+        email="bench@example.com",
+        defaults={"username": "bench", "role": "sales_executive"},
+    )
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(manager)
+    catalog = Catalog()
+    rng = random.Random(args.seed)
+
+    names = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    results = []
+    for name in names:
+        # Прогрев: шаблоны, соединение, кэш запросов
+        run_scenario(client, name, catalog, min(10, args.requests), rng, args.cold)
+        result = run_scenario(client, name, catalog, args.requests, rng, args.cold)
+        result.update(products=catalog.count, generate_s=generated and round(generated, 1))
+        results.append(result)
+    return results
+
+
+def print_result(result):
+    print(
+        f"{result['products']:>9} {result['scenario']:17} "
+        f"p50 {result['p50_ms']:>8} p95 {result['p95_ms']:>8} p99 {result['p99_ms']:>8} мс  "
+        f"{result['throughput_rps']:>7} rps  SQL {result['queries_mean']} "
+        f"(макс. {result['queries_max']})  ошибок {result['errors']}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Размеры каталога.")
+    parser.add_argument("--shops", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий.")
+    parser.add_argument("--scenarios", help="Сценарии через запятую (по умолчанию все).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cold", action="store_true", help="Очищать кэш перед запросом.")
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="Каталог для баз.")
+    parser.add_argument("--out", help="Файл для результатов в JSON.")
+    # Внутренний режим: один размер в отдельном процессе
+    parser.add_argument("--products", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.products is not None:
+        json.dump(run_size(args), sys.stdout, ensure_ascii=False)
+        return
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        env = dict(
+            os.environ,
+            SHOPLIST_DB_NAME=os.path.join(args.db_dir, f"shoplist_bench_{size}.sqlite3"),
+        )
+        env.setdefault("DJANGO_SETTINGS_MODULE", "shoplist.settings")
+        command = [sys.executable, "-m", "benchmarks.scenarios", "--products", str(size)]
+        command += sys.argv[1:] if argv is None else argv
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True)
+        for result in json.loads(output.stdout):
+            print_result(result)
+            results.append(result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Конкурентные читатели и писатели на одном файле SQLite.
+
+Сравнивает профили подключения из ``shoplist/database.py``::
+
+    DJANGO_SETTINGS_MODULE=shoplist.settings python -m benchmarks.sqlite_contention \\
+        --readers 8 --writers 4 --duration 5 --out sqlite_contention.json
+
+Писатель повторяет транзакцию «прочитать — изменить» (как форма
+редактирования товара), читатель — агрегирующий SELECT. Ошибки
+«database is locked» считаются отдельно.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+
+from .http_load import percentile
+
+ROWS = 100
+
+#: Отдельный псевдоним, чтобы не пересекаться с ``django.db.connections``
+#: (``ConnectionHandler`` требует ``default`` — там пустая заглушка).
+ALIAS = "contention"
+
+
+def _prepare(handler):
+    with handler[ALIAS].cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS contention_item "
+            "(id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        cursor.execute("DELETE FROM contention_item")
+        cursor.executemany(
+            "INSERT INTO contention_item (id, value) VALUES (%s, 0)",
+            [(pk,) for pk in range(1, ROWS + 1)],
+        )
+    handler[ALIAS].close()
+
+
+def _write(db, pk):
+    # Режим транзакции (OPTIONS["transaction_mode"]) известен после подключения
+    db.ensure_connection()
+    mode = db.transaction_mode or ""
+    with db.cursor() as cursor:
+        cursor.execute(f"BEGIN {mode}")
+        try:
+            cursor.execute("SELECT value FROM contention_item WHERE id = %s", [pk])
+            (value,) = cursor.fetchone()
+            cursor.execute("UPDATE contention_item SET value = %s WHERE id = %s", [value + 1, pk])
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+
+def _read(db):
+    with db.cursor() as cursor:
+        cursor.execute("SELECT SUM(value) FROM contention_item")
+        cursor.fetchone()
+
+
+def run_contention(settings_dict, readers=4, writers=4, duration=2.0):
+    """Нагружает базу из ``settings_dict`` и возвращает сводку по операциям."""
+    handler = ConnectionHandler({"default": {}, ALIAS: settings_dict})
+    _prepare(handler)
+    deadline = time.monotonic() + duration
+    timings = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def worker(kind, number):
+        db = handler[ALIAS]
+        done, failed, step = [], 0, number
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == "write":
+                        step += writers
+                        _write(db, step % ROWS + 1)
+                    else:
+                        _read(db)
+                except OperationalError:
+                    failed += 1
+                    continue
+                done.append(time.perf_counter() - started)
+        finally:
+            db.close()
+        with lock:
+            timings[kind].extend(done)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=("read", i)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write", i)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = {"readers": readers, "writers": writers, "duration_s": duration}
+    for kind in ("read", "write"):
+        values = sorted(timings[kind])
+        p95 = percentile(values, 95)
+        result[f"{kind}s"] = len(values)
+        result[f"{kind}_errors"] = errors[kind]
+        result[f"{kind}_p95_ms"] = round(p95 * 1000, 2) if p95 is not None else None
+    return result
+
+
+def main(argv=None):
+    import django
+
+    django.setup()
+    from shoplist.database import PROFILES, sqlite_database
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--out", help="Файл для результатов в JSON.")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PROFILES:
+            name = os.path.join(directory, f"{profile}.sqlite3")
+            result = run_contention(
+                sqlite_database(name, profile), args.readers, args.writers, args.duration
+            )
+            result["profile"] = profile
+            results.append(result)
+            print(
+                f"{profile:12} чтений {result['reads']:>7} (ошибок {result['read_errors']}, "
+                f"p95 {result['read_p95_ms']} мс)  записей {result['writes']:>6} "
+                f"(ошибок {result['write_errors']}, p95 {result['write_p95_ms']} мс)"
+            )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
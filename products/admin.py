@@ -1,13 +1,57 @@
+from functools import cached_property
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Max, Q
+
+from . import search
 from .models import Shop, Product, CustomUser
 
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списков админки без полного COUNT(*) по большой таблице.
+
+    Строки считаются не дальше ``count_cap``. Если их больше, для списка
+    без фильтров число строк оценивается по наибольшему id (одно чтение
+    индекса), а для отфильтрованного показываются первые ``count_cap``.
+    """
+
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        capped = self.object_list.order_by()[: self.count_cap + 1].count()
+        if capped <= self.count_cap:
+            return capped
+        if self.object_list.query.has_filters():
+            return self.count_cap
+        model = self.object_list.model
+        largest = model._default_manager.using(self.object_list.db).aggregate(Max("pk"))
+        return max(largest["pk__max"] or 0, capped)
+
+
+def prefix_search(queryset, fields, term):
+    """Поиск по началу значения через диапазон: читается обычный индекс.
+
+    ``LIKE 'term%'`` в SQLite не использует индекс с сортировкой BINARY,
+    а условие ``term <= поле < term + U+10FFFF`` — использует.
+    """
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__gte": term, f"{field}__lt": term + "\U0010ffff"})
+    return queryset.filter(condition)
+
+
 # Регистрация магазинов
 
 
 @admin.register(Shop)
 class ShopAdmin(admin.ModelAdmin):
-    list_display = ("name", "address")
+    list_display = ("name", "address", "product_count")
+    # Нужен для выбора магазина в товаре (autocomplete_fields)
+    search_fields = ("name",)
+    ordering = ("name",)
 
 
 # Регистрация товаров
@@ -16,8 +60,21 @@ class ShopAdmin(admin.ModelAdmin):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "price", "shop")
-    search_fields = ("name",)
+    # Магазин строки выбирается тем же запросом, а не отдельно для каждой
+    list_select_related = ("shop",)
+    # Магазин выбирается поиском, а не списком из всех магазинов
+    autocomplete_fields = ("shop",)
     list_filter = ("shop",)
+    search_fields = ("name",)
+    search_help_text = "Поиск по названию и описанию (полнотекстовый индекс)"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексу FTS5 вместо ``LIKE '%…%'`` по всей таблице."""
+        if not search_term.strip():
+            return queryset, False
+        return search.search_products(queryset, search_term), False
 
 
 # Регистрация пользователей
@@ -53,4 +110,14 @@ class CustomUserAdmin(UserAdmin):
         ),
     )
     search_fields = ("email", "username")
+    search_help_text = "Поиск по началу email или имени пользователя (с учётом регистра)"
     ordering = ("email",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по началу email и имени через их уникальные индексы."""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return prefix_search(queryset, ("email", "username"), search_term), False
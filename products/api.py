@@ -0,0 +1,231 @@
+"""Лёгкий JSON API каталога (только чтение).
+
+Ответы строятся напрямую из строк ``.values()`` — без создания
+объектов моделей. Поля магазина берутся тем же запросом через JOIN.
+Поддерживаются выбор полей (``?fields=id,name``), размер страницы
+(``?limit=``) и курсорная пагинация (``?cursor=``).
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import InvalidPage
+from django.db.models import F
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.generic import View
+
+from . import images, suggest
+from .filters import filter_products
+from .models import Product, Shop
+from .pagination import CursorPaginator
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _image_url(name):
+    return images.get_storage().url(name) if name else None
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ApiError(Exception):
+    """Ошибка запроса, возвращаемая клиенту как JSON с кодом 400/404."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Serializer:
+    """Сериализатор строк ``.values()`` с выбором полей.
+
+    ``fields`` — отображение «имя в ответе → путь в ORM».
+    """
+
+    def __init__(self, fields, converters=None):
+        self.fields = fields
+        self.converters = converters or {}
+
+    def select(self, requested):
+        """Проверяет список полей из ``?fields=`` (пусто — все поля)."""
+        if not requested:
+            return list(self.fields)
+        names = [name.strip() for name in requested.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Неизвестные поля: {', '.join(unknown)}")
+        return names
+
+    def values(self, queryset, names, extra=()):
+        """``queryset.values()`` только с нужными колонками."""
+        columns = {name: F(self.fields[name]) for name in names if self.fields[name] != name}
+        plain = [name for name in names if self.fields[name] == name]
+        plain += [name for name in extra if name not in names]
+        return queryset.values(*plain, **columns)
+
+    def serialize(self, row, names):
+        result = {}
+        for name in names:
+            convert = self.converters.get(name, _plain)
+            result[name] = convert(row[name])
+        return result
+
+
+PRODUCT_SERIALIZER = Serializer(
+    {
+        "id": "id",
+        "sku": "sku",
+        "name": "name",
+        "description": "description",
+        "price": "price",
+        "image": "image",
+        "image_width": "image_width",
+        "image_height": "image_height",
+        "updated_at": "updated_at",
+        "shop_id": "shop_id",
+        "shop_name": "shop__name",
+        "shop_address": "shop__address",
+    },
+    converters={"image": _image_url},
+)
+
+SHOP_SERIALIZER = Serializer(
+    {
+        "id": "id",
+        "name": "name",
+        "address": "address",
+        "product_count": "product_count",
+        "updated_at": "updated_at",
+    }
+)
+
+
+class ApiMixin:
+    """Общие части синхронных и асинхронных представлений API."""
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError("limit должен быть числом")
+        return max(1, min(limit, MAX_LIMIT))
+
+    def get_paginator(self, queryset, serializer):
+        """Пагинатор по строкам ``.values()`` и список полей ответа."""
+        names = serializer.select(self.request.GET.get("fields"))
+        # Поля сортировки нужны в строке для построения курсора
+        keys = [str(field).lstrip("-") for field in queryset.query.order_by]
+        paginator = CursorPaginator(
+            serializer.values(queryset, names, extra=keys), self.get_limit()
+        )
+        return paginator, names
+
+    def page_response(self, page, serializer, names, **extra):
+        """Ответ в формате ``results/next/previous``."""
+        return JsonResponse(
+            {
+                **extra,
+                "results": [serializer.serialize(row, names) for row in page],
+                "next": self.page_url(page.next_cursor),
+                "previous": self.page_url(page.previous_cursor),
+            },
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+    def page_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params["cursor"] = cursor
+        return f"{self.request.path}?{params.urlencode()}"
+
+
+class ApiView(ApiMixin, LoginRequiredMixin, View):
+    """Базовый класс API: JSON-ошибки и ответ 403 без входа."""
+
+    raise_exception = True
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
+
+    def paginated(self, queryset, serializer):
+        paginator, names = self.get_paginator(queryset, serializer)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise ApiError(str(e))
+        return self.page_response(page, serializer, names)
+
+
+class ProductListApiView(ApiView):
+    """Список товаров с фильтрами ``q`` и ``shop``."""
+
+    def get(self, request, *args, **kwargs):
+        queryset = filter_products(Product.objects.all(), request.GET)
+        return self.paginated(queryset, PRODUCT_SERIALIZER)
+
+
+class ProductDetailApiView(ApiView):
+    """Один товар по id."""
+
+    def get(self, request, pk, *args, **kwargs):
+        names = PRODUCT_SERIALIZER.select(request.GET.get("fields"))
+        row = PRODUCT_SERIALIZER.values(Product.objects.filter(pk=pk), names).first()
+        if row is None:
+            raise ApiError("Товар не найден", status=404)
+        return JsonResponse(
+            PRODUCT_SERIALIZER.serialize(row, names),
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+
+class ShopListApiView(ApiView):
+    """Список магазинов."""
+
+    def get(self, request, *args, **kwargs):
+        return self.paginated(Shop.objects.order_by("id"), SHOP_SERIALIZER)
+
+
+class SuggestApiView(ApiView):
+    """Подсказки по началу запроса ``q``: товары и магазины.
+
+    Отвечает из индекса префиксов в памяти процесса
+    (:mod:`products.suggest`), без запросов к базе.
+    """
+
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.GET.get("limit", self.default_limit))
+        except ValueError:
+            raise ApiError("limit должен быть числом")
+        limit = max(1, min(limit, self.max_limit))
+        found = suggest.get_index().suggest(request.GET.get("q", ""), limit)
+        products_url = reverse("products")
+        return JsonResponse(
+            {
+                "products": [
+                    {"id": pk, "name": name, "url": reverse("product_detail", args=[pk])}
+                    for pk, name in found[suggest.PRODUCT]
+                ],
+                "shops": [
+                    {"id": pk, "name": name, "url": f"{products_url}?shop={pk}"}
+                    for pk, name in found[suggest.SHOP]
+                ],
+            },
+            json_dumps_params={"ensure_ascii": False},
+        )
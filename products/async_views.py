@@ -0,0 +1,77 @@
+"""Асинхронные представления каталога для запуска через ASGI.
+
+Используют асинхронный ORM (``aiterator``, ``aget``, ``acount``),
+поэтому один ASGI-воркер обслуживает много медленных клиентов
+без отдельного потока на каждый запрос. Формат ответов совпадает
+с синхронным JSON API (:mod:`products.api`).
+"""
+
+from django.core.paginator import InvalidPage
+from django.http import JsonResponse
+from django.views.generic import View
+
+from .api import PRODUCT_SERIALIZER, ApiError, ApiMixin
+from .filters import filter_products
+from .models import Product
+
+
+class AsyncApiView(ApiMixin, View):
+    """Базовый асинхронный класс: вход проверяется через ``request.auser()``."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "Требуется вход"}, status=403)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
+
+    async def apaginated(self, queryset, serializer, with_count=False):
+        paginator, names = self.get_paginator(queryset, serializer)
+        try:
+            page = await paginator.apage(self.request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise ApiError(str(e))
+        extra = {}
+        if with_count:
+            count = await paginator.acount()
+            extra = {
+                "count": min(count, paginator.count_cap),
+                "count_is_capped": count > paginator.count_cap,
+            }
+        return self.page_response(page, serializer, names, **extra)
+
+
+class AsyncProductListView(AsyncApiView):
+    """Список товаров с фильтрами ``q`` и ``shop``."""
+
+    async def get(self, request, *args, **kwargs):
+        queryset = filter_products(Product.objects.all(), request.GET)
+        return await self.apaginated(queryset, PRODUCT_SERIALIZER)
+
+
+class AsyncProductDetailView(AsyncApiView):
+    """Один товар по id."""
+
+    async def get(self, request, pk, *args, **kwargs):
+        names = PRODUCT_SERIALIZER.select(request.GET.get("fields"))
+        queryset = PRODUCT_SERIALIZER.values(Product.objects.filter(pk=pk), names)
+        try:
+            row = await queryset.aget()
+        except Product.DoesNotExist:
+            raise ApiError("Товар не найден", status=404)
+        return JsonResponse(
+            PRODUCT_SERIALIZER.serialize(row, names),
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+
+class AsyncProductSearchView(AsyncApiView):
+    """Поиск товаров по ``q`` с числом найденных (до предела пагинатора)."""
+
+    async def get(self, request, *args, **kwargs):
+        if not request.GET.get("q", "").strip():
+            raise ApiError("Не указан запрос q")
+        queryset = filter_products(Product.objects.all(), request.GET)
+        return await self.apaginated(queryset, PRODUCT_SERIALIZER, with_count=True)
@@ -0,0 +1,106 @@
+"""Кэш пользователя запроса в памяти процесса.
+
+Стандартный ``AuthenticationMiddleware`` на каждый запрос выбирает
+пользователя из базы. ``CachedAuthenticationMiddleware`` хранит его
+``AUTH_USER_CACHE_SECONDS`` секунд по ключу сессии. Запись действует,
+только пока сессия ссылается на того же пользователя с тем же хешем
+пароля: выход и смена пароля в этой сессии отменяют её сразу.
+Сохранение или удаление пользователя сбрасывает его записи в текущем
+процессе; другие процессы увидят новую роль или пароль не позже чем
+через время жизни записи.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+
+class UserCache:
+    """Пользователи по ключу сессии с ограничением числа записей (LRU)."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # ключ сессии → (истекает, id пользователя, хеш сессии, пользователь)
+        self.entries = OrderedDict()
+
+    def get(self, session_key, user_id, session_hash):
+        """Копия пользователя или ``None``, если записи нет или она устарела."""
+        with self.lock:
+            entry = self.entries.get(session_key)
+            if entry is not None:
+                self.entries.move_to_end(session_key)
+        if entry is None:
+            return None
+        expires, cached_id, cached_hash, user = entry
+        if expires < time.monotonic() or (cached_id, cached_hash) != (user_id, session_hash):
+            return None
+        # Копия: представления не должны делить один объект между потоками
+        return copy.copy(user)
+
+    def set(self, session_key, user, session_hash, timeout):
+        with self.lock:
+            self.entries[session_key] = (
+                time.monotonic() + timeout,
+                str(user.pk),
+                session_hash,
+                user,
+            )
+            self.entries.move_to_end(session_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def evict_user(self, user_id):
+        """Удаляет все записи пользователя (после его изменения)."""
+        user_id = str(user_id)
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[1] == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+#: Кэш текущего процесса.
+user_cache = UserCache()
+
+
+def get_user(request):
+    """Пользователь запроса: из кэша процесса или через ``auth.get_user``."""
+    timeout = getattr(settings, "AUTH_USER_CACHE_SECONDS", 30)
+    session = request.session
+    session_key = session.session_key
+    user_id = session.get(auth.SESSION_KEY)
+    if timeout and session_key and user_id:
+        user = user_cache.get(session_key, user_id, session.get(auth.HASH_SESSION_KEY))
+        if user is not None:
+            return user
+    user = auth.get_user(request)
+    if timeout and session_key and user.is_authenticated:
+        # auth.get_user мог обновить хеш в сессии (смена SECRET_KEY)
+        user_cache.set(session_key, user, session.get(auth.HASH_SESSION_KEY), timeout)
+    return user
+
+
+async def aget_user(request):
+    if not hasattr(request, "_acached_user"):
+        request._acached_user = await sync_to_async(get_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` с пользователем из кэша процесса."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(aget_user, request)
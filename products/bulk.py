@@ -0,0 +1,102 @@
+"""Массовые изменения товаров: цена и магазин одним UPDATE.
+
+Изменение применяется ко всем товарам, подходящим под фильтры списка
+(``q``, ``shop``, ``min_price``, ``max_price``), одним запросом
+``UPDATE`` с выражениями ``F()`` в одной транзакции. Сигналы
+``post_save`` при этом не вызываются, поэтому версия каталога и счётчики
+товаров магазинов обновляются здесь. Поисковый индекс хранит только
+название и описание — его обновлять не нужно.
+"""
+
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from . import cache, facets
+from .filters import filter_products
+from .models import Product
+
+PERCENT = "percent"
+AMOUNT = "amount"
+MOVE = "move"
+
+#: Виды массовых изменений для формы.
+ACTION_CHOICES = [
+    (PERCENT, "Изменить цену на процент"),
+    (AMOUNT, "Изменить цену на сумму"),
+    (MOVE, "Перенести в магазин"),
+]
+
+#: Фильтры списка товаров, по которым выбираются изменяемые товары.
+FILTER_PARAMS = ("q", "shop", "min_price", "max_price")
+
+
+def matching_products(params, using="default"):
+    """Товары, подходящие под фильтры, без сортировки и аннотаций."""
+    params = {key: params[key] for key in FILTER_PARAMS if params.get(key)}
+    return filter_products(Product.objects.using(using), params).order_by()
+
+
+def new_price(action, value):
+    """Выражение новой цены, округлённой до копеек."""
+    value = Decimal(value)
+    if action == PERCENT:
+        expression = F("price") * Value(1 + value / 100)
+    elif action == AMOUNT:
+        expression = F("price") + Value(value)
+    else:
+        raise ValueError(f"Неизвестное изменение цены: {action}")
+    price_field = Product._meta.get_field("price")
+    return ExpressionWrapper(
+        Round(expression, price_field.decimal_places),
+        output_field=DecimalField(
+            max_digits=price_field.max_digits, decimal_places=price_field.decimal_places
+        ),
+    )
+
+
+def check_prices(queryset, price):
+    """Ошибка, если хотя бы одна новая цена не больше 0 (как в ``ProductForm``)."""
+    if queryset.annotate(new_price=price).filter(new_price__lte=0).exists():
+        raise ValidationError("Цена должна быть больше 0.")
+
+
+def change_prices(params, action, value, dry_run=False, using="default"):
+    """Меняет цену подходящих товаров; возвращает число затронутых товаров.
+
+    При ``dry_run`` выполняются те же проверки, но без изменений.
+    """
+    price = new_price(action, value)
+    with transaction.atomic(using=using):
+        queryset = matching_products(params, using)
+        check_prices(queryset, price)
+        if dry_run:
+            return queryset.count()
+        updated = queryset.update(price=price, updated_at=timezone.now())
+        transaction.on_commit(cache.bump_catalog_version, using=using)
+    return updated
+
+
+def move_products(params, shop, dry_run=False, using="default"):
+    """Переносит подходящие товары в магазин ``shop``; возвращает их число.
+
+    Счётчики ``product_count`` исправляются по числу перенесённых товаров
+    каждого магазина (один запрос с GROUP BY), без пересчёта всех магазинов.
+    """
+    with transaction.atomic(using=using):
+        queryset = matching_products(params, using).exclude(shop=shop)
+        if dry_run:
+            return queryset.count()
+        moved = dict(queryset.values_list("shop_id").annotate(count=Count("pk")))
+        if not moved:
+            return 0
+        updated = queryset.update(shop=shop, updated_at=timezone.now())
+        for shop_id, count in moved.items():
+            facets.add_product_count(shop_id, -count, using=using)
+        facets.add_product_count(shop.pk, sum(moved.values()), using=using)
+        transaction.on_commit(cache.bump_catalog_version, using=using)
+    return updated
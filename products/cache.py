@@ -0,0 +1,181 @@
+"""Кэш отрисованной сетки товаров и списка магазинов.
+
+Ключи включают версию каталога: любое изменение товара или магазина
+увеличивает версию, и все старые значения перестают использоваться
+(истекают по таймауту).
+
+Сами фрагменты лежат в кэше процесса, а версия — в основной базе
+(:class:`products.models.CatalogVersion`): при нескольких процессах
+изменение, сделанное в одном, сразу сбрасывает кэш и ETag списка во
+всех. В пределах HTTP-запроса версия читается из базы один раз
+(:class:`CatalogVersionMiddleware`).
+"""
+
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.safestring import mark_safe
+
+GRID_HITS_KEY = "products:grid:hits"
+GRID_MISSES_KEY = "products:grid:misses"
+SHOPS_KEY = "products:shops"
+
+
+CATALOG_VERSION_PK = 1
+
+
+class _RequestVersion:
+    """Версия, прочитанная в текущем запросе (объект изменяемый: его
+    видят и потоки ``sync_to_async``, где контекст копируется)."""
+
+    value = None
+
+
+# None — вне HTTP-запроса: версия читается из базы при каждом обращении
+_request_version = ContextVar("catalog_version", default=None)
+
+
+@contextmanager
+def version_scope():
+    """Версия каталога внутри блока читается из базы один раз."""
+    token = _request_version.set(_RequestVersion())
+    try:
+        yield
+    finally:
+        _request_version.reset(token)
+
+
+def catalog_version():
+    """Текущая версия каталога (из основной базы)."""
+    from .models import CatalogVersion
+
+    memo = _request_version.get()
+    if memo is not None and memo.value is not None:
+        return memo.value
+    version = (
+        CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK)
+        .values_list("value", flat=True)
+        .first()
+    )
+    if version is None:
+        # Строку создаёт миграция 0012; здесь — если её удалили
+        version = CatalogVersion.objects.get_or_create(
+            pk=CATALOG_VERSION_PK, defaults={"value": time.time_ns()}
+        )[0].value
+    if memo is not None:
+        memo.value = version
+    return version
+
+
+def bump_catalog_version():
+    """Увеличивает версию каталога, делая устаревшими все фрагменты.
+
+    Версия не меньше текущего времени в наносекундах: после отката
+    транзакции или восстановления базы из копии она не повторит уже
+    использованную, под которой в кэше процессов могут лежать фрагменты.
+    """
+    from .models import CatalogVersion
+
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        value=Greatest(F("value") + 1, time.time_ns())
+    )
+    if not updated:
+        CatalogVersion.objects.get_or_create(
+            pk=CATALOG_VERSION_PK, defaults={"value": time.time_ns()}
+        )
+    memo = _request_version.get()
+    if memo is not None:
+        memo.value = None
+
+
+class CatalogVersionMiddleware:
+    """Читает версию каталога не больше одного раза за запрос.
+
+    Без неё валидаторы ETag, кэш сетки и фасеты читали бы версию из базы
+    каждый раз. Изменение каталога в этом же запросе сбрасывает
+    запомненное значение.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with version_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with version_scope():
+            return await self.get_response(request)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def grid_cache_key(params):
+    """Ключ фрагмента по параметрам запроса и версии каталога."""
+    items = sorted((key, tuple(params.getlist(key))) for key in params)
+    items.append(("mode", settings.PRODUCT_LIST_PAGINATION))
+    digest = hashlib.md5(repr(items).encode()).hexdigest()
+    return f"products:grid:{catalog_version()}:{digest}"
+
+
+def get_grid(params):
+    """Возвращает сохранённый фрагмент сетки или ``None``."""
+    html = cache.get(grid_cache_key(params))
+    _count(GRID_HITS_KEY if html is not None else GRID_MISSES_KEY)
+    return mark_safe(html) if html is not None else None
+
+
+def _timeout(using):
+    timeout = settings.PRODUCT_GRID_CACHE_TIMEOUT
+    if using != "default":
+        # Реплика могла ещё не получить изменение, увеличившее версию
+        timeout = min(timeout, settings.REPLICA_PIN_SECONDS)
+    return timeout
+
+
+def set_grid(params, html, using="default"):
+    """Сохраняет фрагмент; ``using`` — база, из которой читались товары."""
+    cache.set(grid_cache_key(params), str(html), _timeout(using))
+
+
+def get_shops():
+    """Сохранённый список магазинов текущей версии каталога или ``None``."""
+    return cache.get(f"{SHOPS_KEY}:{catalog_version()}")
+
+
+def set_shops(shops, using="default"):
+    """Сохраняет список магазинов; ``using`` — база, из которой он прочитан."""
+    cache.set(f"{SHOPS_KEY}:{catalog_version()}", shops, _timeout(using))
+
+
+def grid_cache_stats():
+    """Счётчики попаданий и промахов кэша сетки."""
+    hits = cache.get(GRID_HITS_KEY, 0)
+    misses = cache.get(GRID_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+        "catalog_version": catalog_version(),
+    }
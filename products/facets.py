@@ -0,0 +1,75 @@
+"""Фасеты списка товаров: магазины с числом товаров.
+
+Число товаров магазина хранится в ``Shop.product_count`` и обновляется
+сигналами в транзакции сохранения или удаления товара, поэтому список
+магазинов без фильтров — одно чтение таблицы магазинов, к тому же
+кэшируемое до следующего изменения каталога. При поиске или фильтре по
+цене товары каждого магазина считаются одним запросом с GROUP BY.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import cache
+from .filters import filter_products
+from .models import Product, Shop
+
+#: Поля магазина в списке фасетов.
+SHOP_FIELDS = ("id", "name", "address", "product_count")
+
+
+def all_shops():
+    """Все магазины (словари с полями ``SHOP_FIELDS``) в порядке id."""
+    shops = cache.get_shops()
+    if shops is None:
+        queryset = Shop.objects.order_by("id").values(*SHOP_FIELDS)
+        shops = list(queryset)
+        cache.set_shops(shops, using=queryset.db)
+    return shops
+
+
+def shop_facets(params):
+    """Магазины с числом ``count`` товаров, подходящих под текущий поиск.
+
+    Фильтр по самому магазину не учитывается: счётчик показывает, сколько
+    товаров найдётся, если выбрать этот магазин.
+    """
+    shops = all_shops()
+    params = params.copy()
+    params.pop("shop", None)
+    queryset = filter_products(Product.objects.all(), params)
+    if not queryset.query.has_filters():
+        return [{**shop, "count": shop["product_count"]} for shop in shops]
+    counts = dict(queryset.order_by().values_list("shop_id").annotate(count=Count("pk")))
+    return [{**shop, "count": counts.get(shop["id"], 0)} for shop in shops]
+
+
+def total_count(shops, params):
+    """Число найденных товаров по уже посчитанным фасетам — без COUNT(*)."""
+    shop_id = params.get("shop")
+    if shop_id and shop_id.isdigit():
+        return next((shop["count"] for shop in shops if shop["id"] == int(shop_id)), 0)
+    return sum(shop["count"] for shop in shops)
+
+
+def add_product_count(shop_id, delta, using="default"):
+    """Изменяет ``product_count`` магазина на ``delta`` одним UPDATE."""
+    Shop.objects.using(using).filter(pk=shop_id).update(
+        product_count=Greatest(F("product_count") + delta, 0)
+    )
+
+
+def recount_product_counts(using="default"):
+    """Пересчитывает ``product_count`` всех магазинов.
+
+    Нужен после массовых операций в обход сигналов (``bulk_create``,
+    ``update``); счётчики читаются по индексу (магазин, id).
+    """
+    counts = (
+        Product.objects.filter(shop=OuterRef("pk"))
+        .order_by()
+        .values("shop")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Shop.objects.using(using).update(product_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,58 @@
+from decimal import Decimal, InvalidOperation
+
+from . import search
+
+#: Допустимые значения ``?sort=`` и их порядок. Последнее поле — ``id``
+#: в том же направлении: порядок однозначен (страницы не теряют и не
+#: повторяют товары), а индекс (цена, id) читается без сортировки.
+SORT_ORDERINGS = {
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+    "newest": ("-id",),
+}
+
+#: Варианты сортировки для формы фильтра.
+SORT_CHOICES = [
+    ("", "По умолчанию"),
+    ("price", "Сначала дешёвые"),
+    ("-price", "Сначала дорогие"),
+    ("newest", "Сначала новые"),
+]
+
+
+def parse_price(value):
+    """Цена из GET-параметра или ``None``, если значение некорректно."""
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
+def filter_products(queryset, params):
+    """Применяет к товарам фильтры ``q``, ``shop``, ``min_price``,
+    ``max_price`` и сортировку ``sort`` из GET-параметров.
+
+    Без поиска и сортировки товары упорядочены по ``id``, при поиске —
+    по релевантности, затем по ``id``. Некорректные значения фильтров
+    игнорируются.
+    """
+    queryset = queryset.order_by("id")
+    query = params.get("q")
+    shop_id = params.get("shop")
+    if query:
+        queryset = search.search_products(queryset, query)
+        if "search_rank" in queryset.query.annotations:
+            queryset = queryset.order_by("search_rank", "id")
+    if shop_id and shop_id.isdigit():
+        queryset = queryset.filter(shop_id=shop_id)
+    min_price = parse_price(params.get("min_price"))
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    max_price = parse_price(params.get("max_price"))
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    ordering = SORT_ORDERINGS.get(params.get("sort"))
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return queryset
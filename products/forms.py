@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
-from .models import CustomUser, Product
+from . import bulk
+from .models import CustomUser, Product, Shop
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -46,3 +47,74 @@ class ProductForm(forms.ModelForm):
         if price is not None and price <= 0:
             raise forms.ValidationError("Цена должна быть больше 0.")
         return price
+
+
+class BulkProductForm(forms.Form):
+    """Массовое изменение цены или магазина товаров, подходящих под фильтры."""
+
+    q = forms.CharField(
+        label="Поиск", required=False, widget=forms.TextInput(attrs={"class": "form-control"})
+    )
+    shop = forms.ModelChoiceField(
+        label="Магазин",
+        queryset=Shop.objects.order_by("id"),
+        required=False,
+        empty_label="Все магазины",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    min_price = forms.DecimalField(
+        label="Цена от", required=False, min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    max_price = forms.DecimalField(
+        label="Цена до", required=False, min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    action = forms.ChoiceField(
+        label="Изменение",
+        choices=bulk.ACTION_CHOICES,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    value = forms.DecimalField(
+        label="Процент или сумма",
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        help_text="Например, -10 — скидка 10% или уменьшение цены на 10.",
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    target_shop = forms.ModelChoiceField(
+        label="Новый магазин",
+        queryset=Shop.objects.order_by("id"),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def clean(self):
+        """Для изменения цены нужна величина, для переноса — магазин."""
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        if action == bulk.MOVE:
+            if cleaned_data.get("target_shop") is None:
+                self.add_error("target_shop", "Выберите магазин.")
+        elif action and not cleaned_data.get("value"):
+            self.add_error("value", "Укажите ненулевое значение.")
+        return cleaned_data
+
+    def filter_params(self):
+        """Фильтры в виде GET-параметров списка товаров."""
+        params = {}
+        for name in bulk.FILTER_PARAMS:
+            value = self.cleaned_data.get(name)
+            if value not in (None, ""):
+                params[name] = str(value.pk if isinstance(value, Shop) else value)
+        return params
+
+    def run(self, dry_run=False):
+        """Выполняет изменение (или проверку) и возвращает число товаров."""
+        params = self.filter_params()
+        if self.cleaned_data["action"] == bulk.MOVE:
+            return bulk.move_products(params, self.cleaned_data["target_shop"], dry_run)
+        return bulk.change_prices(
+            params, self.cleaned_data["action"], self.cleaned_data["value"], dry_run
+        )
@@ -0,0 +1,103 @@
+"""Уменьшенные копии изображений товаров для ``srcset``.
+
+Копии в формате WebP лежат рядом с оригиналом:
+``products/i_1.webp`` → ``products/i_1.320w.webp``, ``products/i_1.640w.webp`` и т.д.
+Копии шире оригинала не строятся.
+"""
+
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+#: Ширины уменьшенных копий, px.
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_QUALITY = 80
+
+
+def get_storage():
+    """Хранилище поля ``Product.image``."""
+    from .models import Product
+
+    return Product._meta.get_field("image").storage
+
+
+def variant_widths(width):
+    """Ширины копий, которые имеет смысл строить для оригинала ширины ``width``."""
+    return [variant for variant in VARIANT_WIDTHS if variant < width]
+
+
+def variant_name(name, width):
+    """Имя файла копии заданной ширины."""
+    root, _ = posixpath.splitext(name)
+    return f"{root}.{width}w.webp"
+
+
+def variant_names(name, width):
+    """Имена всех копий для оригинала ширины ``width``."""
+    return [variant_name(name, variant) for variant in variant_widths(width)]
+
+
+def generate_variants(name, storage=None, force=False):
+    """Строит копии изображения и возвращает размеры оригинала ``(w, h)``."""
+    storage = storage or get_storage()
+    with storage.open(name, "rb") as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    for variant in variant_widths(width):
+        target = variant_name(name, variant)
+        if storage.exists(target):
+            if not force:
+                continue
+            storage.delete(target)
+        resized = image.resize((variant, round(height * variant / width)), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, "WEBP", quality=VARIANT_QUALITY)
+        save = getattr(storage, "save_variant", storage.save)
+        save(target, ContentFile(buffer.getvalue()))
+    return width, height
+
+
+def build_variants(name, force=False):
+    """Обёртка для пула процессов: ``(name, размеры или None, ошибка)``."""
+    try:
+        return name, generate_variants(name, force=force), None
+    except Exception as e:  # повреждённый или отсутствующий файл
+        return name, None, str(e)
+
+
+def update_product_variants(product_id, name, using="default"):
+    """Строит копии для изображения товара и сохраняет его размеры."""
+    from .models import Product
+
+    queryset = Product.objects.using(using).filter(pk=product_id, image=name)
+    try:
+        width, height = generate_variants(name)
+    except Exception:
+        logger.exception("Не удалось построить копии изображения %s", name)
+        return
+    queryset.update(image_width=width, image_height=height, updated_at=timezone.now())
+    # Размеры попадают в разметку карточек, поэтому сетку нужно перерисовать
+    bump_catalog_version()
+
+
+def srcset_candidates(name, width, height):
+    """Список ``(url, ширина, высота)`` от меньшей копии к оригиналу."""
+    storage = get_storage()
+    candidates = [
+        (storage.url(variant_name(name, variant)), variant, round(height * variant / width))
+        for variant in variant_widths(width)
+    ]
+    candidates.append((storage.url(name), width, height))
+    return candidates
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from products import images
+from products.cache import bump_catalog_version
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """Перевод загруженных ранее изображений на имена по хешу содержимого.
+
+    Каждый файл со старым именем (``i_7_ZUmxxEQ.webp``) сохраняется в
+    хранилище по хешу; одинаковые файлы сходятся в один. Ссылки товаров
+    переписываются, копии для ``srcset`` строятся для нового имени, если
+    их ещё нет. Старые файлы удаляются только с ``--delete-old`` и только
+    когда на них не ссылается ни один товар.
+    """
+
+    help = "Переводит изображения товаров на имена по хешу содержимого (дедупликация)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только посчитать, ничего не менять."
+        )
+        parser.add_argument(
+            "--delete-old", action="store_true", help="Удалить старые файлы и их копии."
+        )
+
+    def handle(self, *args, **options):
+        storage = images.get_storage()
+        names = (
+            Product.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .order_by("image")
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        old_bytes = 0
+        new_files = {}
+        rewritten = failed = 0
+        for name in list(names):
+            if storage.is_hashed(name):
+                continue
+            try:
+                size = storage.size(name)
+                with storage.open(name, "rb") as source:
+                    if options["dry_run"]:
+                        new_name = storage.hashed_name(name, source)
+                    else:
+                        new_name = storage.save(name, source)
+            except OSError as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+                continue
+            old_bytes += size
+            new_files[new_name] = size
+            if not options["dry_run"]:
+                self.rewrite(name, new_name)
+                if options["delete_old"]:
+                    self.delete_old(storage, name)
+            rewritten += 1
+
+        if rewritten and not options["dry_run"]:
+            bump_catalog_version()
+        saved = old_bytes - sum(new_files.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Файлов: {rewritten} → {len(new_files)}, освобождается "
+                f"{saved / 1024:.1f} КиБ, ошибок: {failed}"
+            )
+        )
+
+    def rewrite(self, name, new_name):
+        """Переписывает ссылки товаров на новое имя вместе с размерами."""
+        fields = {"image": new_name, "updated_at": timezone.now()}
+        try:
+            fields["image_width"], fields["image_height"] = images.generate_variants(new_name)
+        except Exception as e:  # не изображение или повреждённый файл
+            self.stderr.write(f"{new_name}: копии не построены ({e})")
+        with transaction.atomic():
+            Product.objects.filter(image=name).update(**fields)
+
+    def delete_old(self, storage, name):
+        if Product.objects.filter(image=name).exists():
+            return
+        for old in [name, *(images.variant_name(name, width) for width in images.VARIANT_WIDTHS)]:
+            if storage.exists(old):
+                storage.delete(old)
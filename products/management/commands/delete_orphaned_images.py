@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from products import images, media
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """Сборка мусора в каталоге изображений товаров.
+
+    Каталог обходится потоком и сравнивается с именами изображений
+    товаров, прочитанными порциями. Файлы моложе ``--min-age`` не
+    трогаются: загрузка может быть ещё не сохранена в базе. Перед
+    удалением ссылка на файл проверяется ещё раз, а сами файлы удаляются
+    в пуле потоков.
+    """
+
+    help = "Удаляет файлы изображений, на которые не ссылается ни один товар."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только показать, что будет удалено."
+        )
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=24,
+            help="Не удалять файлы моложе стольких часов (по умолчанию 24).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Число потоков для удаления."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000, help="Порция чтения имён из базы."
+        )
+
+    def handle(self, *args, **options):
+        storage = images.get_storage()
+        directory = Product._meta.get_field("image").upload_to.rstrip("/")
+        roots = media.referenced_roots(chunk_size=options["chunk_size"])
+        candidates = media.orphaned_files(
+            storage, directory, roots, options["min_age"] * 3600
+        )
+
+        found = freed = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = []
+            for name, size in candidates:
+                # Ссылка могла появиться после чтения имён из базы
+                if media.is_referenced(name):
+                    continue
+                found += 1
+                freed += size
+                if options["dry_run"]:
+                    self.stdout.write(name)
+                else:
+                    futures.append((name, executor.submit(storage.delete, name)))
+            for name, future in futures:
+                try:
+                    future.result()
+                except OSError as e:
+                    failed += 1
+                    self.stderr.write(f"{name}: {e}")
+
+        action = "Можно удалить" if options["dry_run"] else "Удалено"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} файлов: {found - failed}, {freed / 1024:.1f} КиБ, ошибок: {failed}"
+            )
+        )
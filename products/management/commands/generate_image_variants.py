@@ -0,0 +1,63 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from products import images
+from products.cache import bump_catalog_version
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """Построение уменьшенных копий для уже загруженных изображений."""
+
+    help = "Строит WebP-копии изображений товаров в пуле процессов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов (по умолчанию — число ядер).",
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Перестроить существующие копии."
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Product.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        # Дочерние процессы не должны наследовать открытые соединения с БД
+        connections.close_all()
+
+        done = failed = 0
+        build = partial(images.build_variants, force=options["force"])
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as executor:
+            for name, size, error in executor.map(build, names, chunksize=8):
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+                    continue
+                width, height = size
+                # updated_at входит в ETag страницы товара: иначе клиенты
+                # получали бы 304 для разметки без размеров и srcset
+                Product.objects.filter(image=name).update(
+                    image_width=width, image_height=height, updated_at=timezone.now()
+                )
+                done += 1
+        if done:
+            bump_catalog_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано изображений: {done}, ошибок: {failed}")
+        )
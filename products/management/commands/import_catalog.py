@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products import facets, search
+from products.cache import bump_catalog_version
+from products.models import Product, Shop
+
+#: Поля, которые обновляются у существующего товара с тем же артикулом.
+UPSERT_FIELDS = ["name", "description", "price", "shop", "updated_at"]
+
+
+class RowError(ValueError):
+    """Строка входного файла не прошла проверку."""
+
+
+def text_value(record, key):
+    """Строковое значение колонки; числа из JSON приводятся к строке."""
+    value = record.get(key)
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, bool)):
+        raise RowError(f"некорректное значение поля {key}")
+    return str(value).strip()
+
+
+class Command(BaseCommand):
+    """Потоковый импорт магазинов и товаров из CSV или JSON Lines.
+
+    Колонки: ``sku``, ``name``, ``description``, ``price``, ``shop``,
+    ``shop_address``. Магазин ищется по названию и создаётся при
+    необходимости. Товар с уже существующим ``sku`` обновляется.
+    """
+
+    help = "Импортирует каталог из CSV или JSON Lines (путь к файлу или «-» для stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл для импорта или «-» для stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Формат входных данных (по умолчанию — по расширению файла).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Число строк в одной транзакции.",
+        )
+        parser.add_argument(
+            "--progress-every",
+            type=int,
+            default=100_000,
+            help="Как часто (в строках) выводить скорость импорта.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным.")
+
+        self.shops = dict(Shop.objects.order_by("-id").values_list("name", "id"))
+        self.started = time.monotonic()
+        self.imported = self.skipped = 0
+        next_progress = options["progress_every"]
+
+        with self.open(path) as stream:
+            batch = []
+            for line_number, record in self.read(stream, fmt):
+                try:
+                    batch.append(self.parse(record))
+                except RowError as e:
+                    self.skipped += 1
+                    self.stderr.write(f"Строка {line_number}: {e}")
+                    continue
+                if len(batch) >= batch_size:
+                    self.flush(batch)
+                    batch = []
+                if self.imported >= next_progress:
+                    self.report()
+                    next_progress += options["progress_every"]
+            self.flush(batch)
+
+        if self.imported:
+            # bulk_create обходит сигналы: счётчики магазинов — одним UPDATE
+            facets.recount_product_counts()
+            bump_catalog_version()
+        self.report(final=True)
+
+    def open(self, path):
+        if path == "-":
+            return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+        try:
+            return open(path, encoding="utf-8-sig", newline="")
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть {path}: {e}")
+
+    def read(self, stream, fmt):
+        """Построчно отдаёт ``(номер строки, dict)`` без чтения файла целиком."""
+        if fmt == "csv":
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = e
+            yield line_number, record
+
+    def parse(self, record):
+        """Проверяет строку и превращает её в несохранённый ``Product``."""
+        if not isinstance(record, dict):
+            raise RowError(f"некорректная строка ({record})")
+        name = text_value(record, "name")
+        shop_name = text_value(record, "shop")
+        if not name:
+            raise RowError("не указано название товара")
+        if not shop_name:
+            raise RowError("не указан магазин")
+        try:
+            price = Decimal(str(record.get("price", "")).strip())
+        except InvalidOperation:
+            raise RowError("некорректная цена")
+        if not price.is_finite() or price <= 0:
+            raise RowError("цена должна быть больше 0")
+        price = self.check_price(price)
+        return Product(
+            sku=text_value(record, "sku") or None,
+            name=name,
+            description=text_value(record, "description"),
+            price=price,
+            shop_id=self.resolve_shop(shop_name, text_value(record, "shop_address")),
+        )
+
+    def check_price(self, price):
+        """Округляет цену до ``decimal_places`` и проверяет ``max_digits`` поля."""
+        field = Product._meta.get_field("price")
+        limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+        if price >= limit:
+            raise RowError(f"цена должна быть меньше {limit}")
+        price = price.quantize(Decimal(1).scaleb(-field.decimal_places))
+        if price >= limit:
+            raise RowError(f"цена должна быть меньше {limit}")
+        if price <= 0:
+            raise RowError("цена должна быть больше 0")
+        return price
+
+    def resolve_shop(self, name, address):
+        """Возвращает id магазина по названию, создавая новый при необходимости."""
+        shop_id = self.shops.get(name)
+        if shop_id is None:
+            shop_id = Shop.objects.create(name=name, address=address).pk
+            self.shops[name] = shop_id
+        return shop_id
+
+    def flush(self, batch):
+        """Сохраняет порцию одной транзакцией и обновляет поисковый индекс."""
+        if not batch:
+            return
+        # При повторе артикула в одной порции побеждает последняя строка
+        with_sku = list({product.sku: product for product in batch if product.sku}.values())
+        without_sku = [product for product in batch if not product.sku]
+        with transaction.atomic():
+            Product.objects.bulk_create(without_sku)
+            if with_sku:
+                Product.objects.bulk_create(
+                    with_sku,
+                    update_conflicts=True,
+                    unique_fields=["sku"],
+                    update_fields=UPSERT_FIELDS,
+                )
+            search.index_rows(
+                (product.pk, product.name, product.description)
+                for product in without_sku + with_sku
+            )
+        self.imported += len(batch)
+
+    def report(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        message = (
+            f"Импортировано строк: {self.imported}, пропущено: {self.skipped}, "
+            f"{elapsed:.1f} с, {self.imported / elapsed:.0f} строк/с"
+        )
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products import search
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """Полная перестройка поискового индекса товаров."""
+
+    help = "Перестраивает полнотекстовый индекс товаров (FTS5)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default="default", help="Алиас базы данных."
+        )
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.using(options["database"])
+        search.rebuild_index(queryset)
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано товаров: {queryset.count()}")
+        )
@@ -0,0 +1,38 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """Копирует основную базу SQLite в файлы реплик.
+
+    Нужна для локальной проверки маршрутизации чтения: вместо потоковой
+    репликации реплика обновляется целиком через backup API SQLite.
+    """
+
+    help = "Копирует основную базу SQLite в реплики из SHOPLIST_DB_REPLICAS."
+
+    def handle(self, *args, **options):
+        aliases = list(getattr(settings, "REPLICA_DATABASES", {}))
+        if not aliases:
+            raise CommandError("Реплики не настроены (переменная SHOPLIST_DB_REPLICAS).")
+        primary = connections["default"]
+        if primary.vendor != "sqlite":
+            raise CommandError("Команда работает только с SQLite.")
+
+        source = sqlite3.connect(primary.settings_dict["NAME"])
+        try:
+            for alias in aliases:
+                # Соединение реплики закрывается, чтобы не держать старый файл
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: {connections[alias].settings_dict['NAME']}")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Обновлено реплик: {len(aliases)}"))
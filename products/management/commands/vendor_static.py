@@ -0,0 +1,72 @@
+import base64
+import hashlib
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOTSTRAP_VERSION = "5.3.2"
+BOOTSTRAP_URL = f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist"
+
+#: Файлы сторонних библиотек: (URL, путь в static/, SRI-хеш опубликованного файла).
+VENDOR_FILES = [
+    (
+        f"{BOOTSTRAP_URL}/css/bootstrap.min.css",
+        "vendor/bootstrap/css/bootstrap.min.css",
+        "sha384-T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN",
+    ),
+    (
+        f"{BOOTSTRAP_URL}/js/bootstrap.bundle.min.js",
+        "vendor/bootstrap/js/bootstrap.bundle.min.js",
+        "sha384-C6RzsynM9kWDrMNeT87bh95OGNyZPhcTNXj1NW7RuBCsyN/o0jlpcV8Qyq46cDfL",
+    ),
+]
+
+# Ссылка на source map: карты не поставляются, а ManifestStaticFilesStorage
+# не соберёт файл со ссылкой на отсутствующую карту
+SOURCE_MAP_RE = re.compile(rb"\n?(/\*# sourceMappingURL=\S+ \*/|//# sourceMappingURL=\S+)\s*$")
+
+
+def integrity(data, algorithm="sha384"):
+    """SRI-хеш (``sha384-…``) содержимого."""
+    digest = hashlib.new(algorithm, data).digest()
+    return f"{algorithm}-{base64.b64encode(digest).decode()}"
+
+
+class Command(BaseCommand):
+    """Загрузка сторонних CSS и JS в ``static/vendor`` для раздачи с нашего сервера.
+
+    Каждый файл сверяется с опубликованным SRI-хешем; ссылка на source
+    map удаляется. Загруженные файлы коммитятся в репозиторий, и тег
+    ``{% vendor_asset %}`` в ``base.html`` подключает их через
+    ``{% static %}`` вместо CDN, поэтому команду нужно запускать только
+    при смене версии.
+    """
+
+    help = "Загружает Bootstrap в static/vendor (с проверкой SRI-хешей)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Загрузить заново существующие файлы."
+        )
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        for url, name, expected in VENDOR_FILES:
+            target = root / name
+            if target.exists() and not options["force"]:
+                self.stdout.write(f"{name}: уже есть")
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    data = response.read()
+            except OSError as e:
+                raise CommandError(f"Не удалось загрузить {url}: {e}")
+            if integrity(data) != expected:
+                raise CommandError(f"{url}: хеш не совпадает с {expected}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(SOURCE_MAP_RE.sub(b"\n", data))
+            self.stdout.write(f"{name}: {len(data) / 1024:.1f} КиБ")
+        self.stdout.write(self.style.SUCCESS(f"Bootstrap {BOOTSTRAP_VERSION} в {root / 'vendor'}"))
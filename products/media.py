@@ -0,0 +1,140 @@
+"""Удаление файлов изображений, на которые не ссылается ни один товар.
+
+Файлы адресуются по содержимому и общие для товаров с одинаковым
+изображением, поэтому файл удаляется только после проверки, что его
+(или оригинал копии для ``srcset``) не использует ни один товар.
+Проверка — один запрос по индексу ``product_image_idx``.
+
+Загрузка уже существующего файла обновляет его время изменения
+(:meth:`products.storage.HashedFileSystemStorage.save`), поэтому период
+ожидания защищает и файлы, ссылка на которые ещё не записана в базу:
+при сборке мусора он задаётся ``--min-age``, при удалении после коммита —
+:data:`DELETE_GRACE_SECONDS`.
+"""
+
+import logging
+import os
+import posixpath
+import re
+import time
+
+from . import images
+
+logger = logging.getLogger(__name__)
+
+#: Файл моложе стольких секунд не удаляется после коммита: его могли
+#: только что загрузить заново для другого товара.
+DELETE_GRACE_SECONDS = 60
+
+# Копия для srcset: ``products/3f/3fa9…c1.320w.webp``
+_VARIANT_RE = re.compile(r"^(.+)\.\d+w\.webp$")
+
+
+def image_root(name):
+    """Имя оригинала без расширения — общее у оригинала и его копий."""
+    match = _VARIANT_RE.match(name)
+    if match:
+        return match.group(1)
+    return posixpath.splitext(name)[0]
+
+
+def image_files(name):
+    """Оригинал и имена всех возможных копий."""
+    return [name, *(images.variant_name(name, width) for width in images.VARIANT_WIDTHS)]
+
+
+def is_referenced(name, using="default"):
+    """Ссылается ли товар на файл или (для копии) на его оригинал.
+
+    Оригиналы с тем же именем без расширения ищутся диапазоном
+    ``root. <= image < root/`` — по индексу, без ``LIKE``.
+    """
+    from .models import Product
+
+    root = image_root(name)
+    return (
+        Product.objects.using(using)
+        .filter(image__gte=f"{root}.", image__lt=f"{root}/")
+        .exists()
+    )
+
+
+def is_recent(storage, name, grace, now=None):
+    """Изменялся ли файл хранилища за последние ``grace`` секунд."""
+    now = time.time() if now is None else now
+    try:
+        return now - os.path.getmtime(storage.path(name)) < grace
+    except OSError:
+        return False
+
+
+def delete_if_unreferenced(name, using="default", storage=None, grace=DELETE_GRACE_SECONDS):
+    """Удаляет файл и его копии, если на них больше никто не ссылается.
+
+    Файл моложе ``grace`` секунд остаётся: его загрузка для другого
+    товара может быть ещё не сохранена в базе. Такой файл позже удалит
+    сборка мусора (``delete_orphaned_images``).
+
+    Возвращает список удалённых имён.
+    """
+    if not name or is_referenced(name, using):
+        return []
+    storage = storage or images.get_storage()
+    if grace and is_recent(storage, name, grace):
+        return []
+    deleted = []
+    for file_name in image_files(name):
+        try:
+            if storage.exists(file_name):
+                storage.delete(file_name)
+                deleted.append(file_name)
+        except OSError:
+            logger.exception("Не удалось удалить файл %s", file_name)
+    return deleted
+
+
+def referenced_roots(using="default", chunk_size=2000):
+    """Имена без расширения всех изображений товаров (читаются порциями)."""
+    from .models import Product
+
+    names = (
+        Product.objects.using(using)
+        .exclude(image="")
+        .exclude(image__isnull=True)
+        .values_list("image", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    return {image_root(name) for name in names}
+
+
+def walk_files(storage, directory):
+    """Файлы каталога хранилища ``(имя, время изменения, размер)`` — потоком.
+
+    Каталоги обходятся через ``os.scandir`` без построения полного списка.
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(storage.path(current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = posixpath.join(current, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_mtime, stat.st_size
+
+
+def orphaned_files(storage, directory, roots, min_age, now=None):
+    """Файлы каталога старше ``min_age`` секунд, не относящиеся к ``roots``."""
+    now = time.time() if now is None else now
+    for name, mtime, size in walk_files(storage, directory):
+        if now - mtime < min_age:
+            continue
+        if image_root(name) in roots:
+            continue
+        yield name, size
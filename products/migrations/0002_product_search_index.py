@@ -0,0 +1,47 @@
+from django.db import migrations
+
+FTS_TABLE = "products_product_fts"
+
+
+def create_search_index(apps, schema_editor):
+    """Создаёт таблицу FTS5 и заполняет её существующими товарами."""
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, description, tokenize = 'unicode61 remove_diacritics 0')"
+    )
+    # Содержимое индекса обязано совпадать с нормализацией запросов,
+    # поэтому берётся текущая normalize (чистая функция над текстом)
+    from products.search import normalize
+
+    Product = apps.get_model("products", "Product")
+    rows = (
+        Product.objects.using(connection.alias)
+        .order_by()
+        .values_list("id", "name", "description")
+        .iterator(chunk_size=2000)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+            ((pk, normalize(name), normalize(description)) for pk, name, description in rows),
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_product_sku"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSearchEntry",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("name", models.TextField()),
+                ("description", models.TextField()),
+            ],
+            options={
+                "db_table": "products_product_fts",
+                "managed": False,
+            },
+        ),
+    ]
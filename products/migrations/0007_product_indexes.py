@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_product_search_entry"),
+    ]
+
+    operations = [
+        # Составной индекс создаётся до удаления индекса внешнего ключа,
+        # чтобы выборки по магазину не оставались без индекса
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["shop", "id"], name="product_shop_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["shop", "price"], name="product_shop_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name"], name="product_name_idx"),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="shop",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="products",
+                to="products.shop",
+            ),
+        ),
+    ]
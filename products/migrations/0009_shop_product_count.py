@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_products(apps, schema_editor):
+    Shop = apps.get_model("products", "Shop")
+    Product = apps.get_model("products", "Product")
+    counts = (
+        Product.objects.filter(shop=OuterRef("pk"))
+        .order_by()
+        .values("shop")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Shop.objects.using(schema_editor.connection.alias).update(
+        product_count=Coalesce(Subquery(counts), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0008_product_price_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shop",
+            name="product_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_products, migrations.RunPython.noop),
+    ]
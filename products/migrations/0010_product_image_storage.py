@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:25
+
+import products.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0009_shop_product_count"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=products.storage.product_image_storage,
+                upload_to="products/",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import time
+
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    """Единственная строка версии; начальное значение — текущее время."""
+    CatalogVersion = apps.get_model("products", "CatalogVersion")
+    CatalogVersion.objects.using(schema_editor.connection.alias).create(
+        pk=1, value=time.time_ns()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0011_product_image_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField()),
+            ],
+            options={
+                "verbose_name": "Версия каталога",
+                "verbose_name_plural": "Версия каталога",
+            },
+        ),
+        migrations.RunPython(create_catalog_version, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
+
+from .storage import product_image_storage
 
 
 class Shop(models.Model):
@@ -7,6 +9,9 @@ class Shop(models.Model):
 
     name = models.CharField(max_length=100)
     address = models.TextField(max_length=255)
+    # Число товаров магазина; обновляется сигналами (см. products.facets)
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Магазин"
@@ -19,19 +24,116 @@ class Shop(models.Model):
 class Product(models.Model):
     """Модель товара."""
 
+    # Внешний артикул для импорта и обновления товаров из других систем
+    sku = models.CharField(max_length=64, unique=True, blank=True, null=True)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    image = models.ImageField(upload_to="products/", blank=True, null=True)
-    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name="products")
+    # Файлы по хешу содержимого: одинаковые загрузки — один файл
+    image = models.ImageField(
+        upload_to="products/", storage=product_image_storage, blank=True, null=True
+    )
+    # Размеры оригинала заполняются при построении уменьшенных копий
+    image_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Отдельный индекс по shop не нужен: его заменяют составные индексы ниже
+    shop = models.ForeignKey(
+        Shop, on_delete=models.CASCADE, related_name="products", db_index=False
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
+        indexes = [
+            # Список товаров магазина в порядке id (страницы и курсор)
+            models.Index(fields=["shop", "id"], name="product_shop_id_idx"),
+            # Товары магазина по цене
+            models.Index(fields=["shop", "price"], name="product_shop_price_idx"),
+            # Сортировка и диапазон цен по всему каталогу
+            models.Index(fields=["price"], name="product_price_idx"),
+            # Поиск по точному названию и сортировка по названию в админке
+            models.Index(fields=["name"], name="product_name_idx"),
+            # Проверка, используется ли файл изображения (products.media)
+            models.Index(fields=["image"], name="product_image_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.shop})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные значения, чтобы отслеживать изменения полей."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Обработчики post_save (число товаров магазина, поисковый индекс)
+        # выполняются в одной транзакции с записью товара
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: field.value_from_object(self)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def loaded_value(self, attname):
+        """Значение поля на момент загрузки или последнего сохранения."""
+        value = getattr(self, "_loaded_values", {}).get(attname)
+        return getattr(value, "name", value) or None
+
+    def field_changed(self, attname):
+        """Изменилось ли поле с момента загрузки (новый объект — всегда да)."""
+        if attname not in getattr(self, "_loaded_values", {}):
+            return True
+        value = getattr(self, attname)
+        return (getattr(value, "name", value) or None) != self.loaded_value(attname)
+
+
+class ProductSearchEntry(models.Model):
+    """Запись полнотекстового индекса товара (виртуальная таблица FTS5).
+
+    Таблица создаётся миграцией ``0002_product_search_index`` и
+    заполняется модулем :mod:`products.search`; модель нужна, чтобы
+    присоединять индекс к запросам товаров одним JOIN.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_entry",
+    )
+    name = models.TextField()
+    description = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = "products_product_fts"
+
+
+class CatalogVersion(models.Model):
+    """Версия каталога (одна строка) для ключей кэша и ETag списка.
+
+    Хранится в базе, а не в локальном кэше процесса: изменение каталога
+    в одном процессе сразу видно всем остальным (см. :mod:`products.cache`).
+    """
+
+    value = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = "Версия каталога"
+        verbose_name_plural = "Версия каталога"
+
 
 class CustomUser(AbstractUser):
     """Кастомная модель пользователя с email и ролью."""
@@ -0,0 +1,201 @@
+"""Курсорная (keyset) пагинация.
+
+Вместо ``OFFSET`` и ``COUNT(*)`` страница выбирается условием
+«после/до ключа последней показанной записи». Ключ строится по полям
+сортировки queryset, которые должны заканчиваться уникальным ``id``.
+"""
+
+import base64
+import json
+import math
+from decimal import Decimal
+from functools import cached_property
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+AFTER = "a"
+BEFORE = "b"
+
+
+class InvalidCursor(InvalidPage):
+    """Повреждённый или не подходящий к сортировке курсор."""
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(direction, values):
+    """Кодирует направление и значения ключа в строку для URL."""
+    payload = json.dumps([direction, [_encode_value(v) for v in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, size):
+    """Разбирает курсор, проверяя направление и число значений ключа."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Некорректный курсор")
+    if direction not in (AFTER, BEFORE) or not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Некорректный курсор")
+    return direction, values
+
+
+class CursorPaginator:
+    """Пагинатор по ключу сортировки queryset."""
+
+    def __init__(self, queryset, per_page, count_cap=1000):
+        ordering = [str(field) for field in queryset.query.order_by]
+        if not ordering or ordering[-1].lstrip("-") not in ("id", "pk"):
+            raise ValueError("Сортировка должна заканчиваться уникальным полем id.")
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.count_cap = count_cap
+        self.ordering = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+    def page(self, cursor=None):
+        """Возвращает страницу для курсора (``None`` — первая страница)."""
+        queryset, direction, has_cursor = self._window(cursor)
+        return self._page(list(queryset), direction, has_cursor)
+
+    async def apage(self, cursor=None):
+        """Асинхронный вариант :meth:`page` (``aiterator``)."""
+        queryset, direction, has_cursor = self._window(cursor)
+        rows = [row async for row in queryset.aiterator()]
+        return self._page(rows, direction, has_cursor)
+
+    def _window(self, cursor):
+        """Queryset на одну запись больше страницы — чтобы узнать, есть ли ещё."""
+        direction, has_cursor, queryset = AFTER, False, self.queryset
+        if cursor:
+            direction, values = decode_cursor(cursor, len(self.ordering))
+            values = self._to_python(values)
+            queryset = queryset.filter(self._keyset_filter(direction, values))
+            has_cursor = True
+        if direction == BEFORE:
+            queryset = queryset.reverse()
+        return queryset[: self.per_page + 1], direction, has_cursor
+
+    def _key_field(self, name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        query = self.queryset.query
+        if name in query.annotations:
+            return query.annotations[name].output_field
+        if name == "pk":
+            return self.queryset.model._meta.pk
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise InvalidCursor("Курсор не подходит к сортировке")
+
+    def _to_python(self, values):
+        """Значения ключа из курсора в типах полей сортировки.
+
+        Подделанный курсор (строка вместо числа, объект, ``null``) даёт
+        :class:`InvalidCursor` — то есть 404, а не ошибку при запросе.
+        """
+        converted = []
+        for (name, _), value in zip(self.ordering, values):
+            if value is None or isinstance(value, (dict, list)):
+                raise InvalidCursor("Некорректный курсор")
+            try:
+                value = self._key_field(name).to_python(value)
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor("Некорректный курсор")
+            if isinstance(value, (Decimal, float)) and not math.isfinite(value):
+                raise InvalidCursor("Некорректный курсор")
+            converted.append(value)
+        return converted
+
+    def _keyset_filter(self, direction, values):
+        # (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...
+        after = direction == AFTER
+        condition = Q()
+        for position, (field, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending == after else "gt"
+            term = Q(**{f"{field}__{lookup}": values[position]})
+            for prev_position in range(position):
+                prev_field = self.ordering[prev_position][0]
+                term &= Q(**{prev_field: values[prev_position]})
+            condition |= term
+        if len(self.ordering) > 1:
+            # Избыточная граница по первому полю: без неё условие с OR
+            # не даёт СУБД начать чтение индекса с нужного места
+            field, descending = self.ordering[0]
+            lookup = "lte" if descending == after else "gte"
+            condition &= Q(**{f"{field}__{lookup}": values[0]})
+        return condition
+
+    def _page(self, rows, direction, has_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == BEFORE:
+            rows.reverse()
+            return CursorPage(rows, self, has_next=True, has_previous=has_more)
+        return CursorPage(rows, self, has_next=has_more, has_previous=has_cursor)
+
+    def key(self, row):
+        """Значения ключа сортировки для записи (модель или dict)."""
+        if isinstance(row, dict):
+            return [row[field] for field, _ in self.ordering]
+        return [getattr(row, field) for field, _ in self.ordering]
+
+    def cursor_after(self, row):
+        """Курсор следующей страницы, начинающейся после записи ``row``."""
+        return encode_cursor(AFTER, self.key(row))
+
+    @cached_property
+    def count(self):
+        """Число записей, ограниченное ``count_cap`` (без полного COUNT)."""
+        return self.queryset.order_by()[: self.count_cap + 1].count()
+
+    async def acount(self):
+        """Асинхронный вариант :attr:`count`."""
+        return await self.queryset.order_by()[: self.count_cap + 1].acount()
+
+    @property
+    def count_is_capped(self):
+        return self.count > self.count_cap
+
+
+class CursorPage:
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_after(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(BEFORE, self.paginator.key(self.object_list[0]))
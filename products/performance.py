@@ -0,0 +1,241 @@
+"""Замеры времени обработки запросов: SQL, шаблоны, представление.
+
+``PerformanceMiddleware`` для каждого запроса считает число SQL-запросов
+и их суммарное время, время отрисовки шаблонов и общее время. SQL
+учитывает обёртка выполнения, которая ставится на каждое соединение
+при его открытии (:func:`install`) и пишет замеры в объект текущего
+запроса из ``ContextVar`` — поэтому учитываются и запросы асинхронного
+ORM, выполняемые в другом потоке. Цифры уходят в
+заголовок ``Server-Timing``, медленные запросы пишутся в лог вместе с
+самыми долгими SQL, а сводка по именам URL хранится в памяти процесса
+и показывается на странице для персонала.
+
+Для потоковых ответов учитывается только время до начала передачи.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def percentile(values, q):
+    """Перцентиль ``q`` (0–100) по отсортированному списку."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(q / 100 * (len(values) - 1)))]
+
+
+class RequestTimings:
+    """Замеры одного запроса; экземпляр служит и обёрткой выполнения SQL."""
+
+    def __init__(self, keep_queries=5):
+        self.keep_queries = keep_queries
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.slowest = []  # куча (мс, sql) с ``keep_queries`` самыми долгими
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.db_ms += elapsed
+            item = (elapsed, sql)
+            if len(self.slowest) < self.keep_queries:
+                heapq.heappush(self.slowest, item)
+            elif self.slowest and item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+
+    def slowest_queries(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: замер в объект текущего запроса, если он есть."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install(connection):
+    """Ставит :func:`record_query` на соединение (повторно — не ставит)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_render():
+    """Учитывает отрисовку шаблона вне ``TemplateResponse`` (``render_to_string``)."""
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.template_ms += (time.perf_counter() - started) * 1000
+
+
+class PerformanceStats:
+    """Сводка по именам URL: число запросов, среднее и перцентили времени."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, name, total_ms, timings):
+        with self.lock:
+            view = self.views.get(name)
+            if view is None:
+                view = self.views[name] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "db_ms": 0.0,
+                    "template_ms": 0.0,
+                    "queries": 0,
+                    "max_ms": 0.0,
+                    "recent": deque(maxlen=self.window),
+                }
+            view["count"] += 1
+            view["total_ms"] += total_ms
+            view["db_ms"] += timings.db_ms
+            view["template_ms"] += timings.template_ms
+            view["queries"] += timings.queries
+            view["max_ms"] = max(view["max_ms"], total_ms)
+            view["recent"].append(total_ms)
+
+    def snapshot(self):
+        """Строки сводки, самые затратные по суммарному времени — первыми."""
+        with self.lock:
+            rows = []
+            for name, view in self.views.items():
+                count = view["count"]
+                recent = sorted(view["recent"])
+                rows.append(
+                    {
+                        "name": name,
+                        "count": count,
+                        "mean_ms": round(view["total_ms"] / count, 2),
+                        "p95_ms": round(percentile(recent, 95), 2),
+                        "max_ms": round(view["max_ms"], 2),
+                        "db_ms": round(view["db_ms"] / count, 2),
+                        "template_ms": round(view["template_ms"] / count, 2),
+                        "queries": round(view["queries"] / count, 2),
+                        "total_s": round(view["total_ms"] / 1000, 3),
+                    }
+                )
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+#: Сводка текущего процесса.
+stats = PerformanceStats()
+
+
+class PerformanceMiddleware:
+    """Замеряет запрос и добавляет заголовок ``Server-Timing``.
+
+    Должна стоять в ``MIDDLEWARE`` перед всеми middleware, обращающимися
+    к базе (сессии, пользователь), чтобы учитывать их запросы; раньше неё
+    стоит только раздача статики. Работает и в синхронном, и в
+    асинхронном режиме: под ASGI цепочка не переводится в поток ради неё.
+    Асинхронный ORM выполняет SQL в потоке через ``sync_to_async``, который
+    копирует контекст, — обёртка соединения видит замеры этого запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(_setting("PERFORMANCE_SLOW_QUERIES", 5))
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings, (time.perf_counter() - started) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings(_setting("PERFORMANCE_SLOW_QUERIES", 5))
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timings, (time.perf_counter() - started) * 1000)
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается последней из middleware — прямо перед отрисовкой
+        timings = _current.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.template_ms += (time.perf_counter() - started) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timings, total_ms):
+        view_ms = total_ms - timings.template_ms
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db_ms:.1f};desc="SQL: {timings.queries}"',
+                f"tpl;dur={timings.template_ms:.1f}",
+                f"view;dur={view_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+        )
+        match = request.resolver_match
+        name = match.view_name if match else "(не найдено)"
+        stats.record(name, total_ms, timings)
+
+        if total_ms >= _setting("PERFORMANCE_SLOW_REQUEST_MS", 500):
+            lines = [
+                f"{elapsed:8.1f} мс  {sql}" for elapsed, sql in timings.slowest_queries()
+            ]
+            logger.warning(
+                "Медленный запрос %s %s (%s): %.1f мс, SQL %d шт. за %.1f мс, "
+                "шаблоны %.1f мс\n%s",
+                request.method,
+                request.get_full_path(),
+                name,
+                total_ms,
+                timings.queries,
+                timings.db_ms,
+                timings.template_ms,
+                "\n".join(lines),
+            )
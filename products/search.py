@@ -0,0 +1,183 @@
+"""Полнотекстовый поиск товаров на базе SQLite FTS5.
+
+Индекс хранит нормализованную форму названия и описания товара
+(регистр, ё→е, простое отсечение окончаний), поэтому запросы
+«Телефон», «телефон» и «телефоны» находят одни и те же товары.
+"""
+
+import re
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Lookup, Q
+
+from .models import ProductSearchEntry
+
+#: Имя виртуальной таблицы FTS5 (rowid совпадает с id товара).
+FTS_TABLE = ProductSearchEntry._meta.db_table
+
+#: Веса колонок для bm25: совпадение в названии важнее описания.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Окончания русских слов.
+_RU_ENDINGS = frozenset((
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ых", "их", "ый", "ий", "ой", "ая", "яя", "ое", "ее", "ые", "ие",
+    "ую", "юю", "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев", "ей",
+    "ью", "ия", "ии",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+))
+_RU_ENDING_LENGTHS = sorted({len(ending) for ending in _RU_ENDINGS}, reverse=True)
+_MIN_STEM = 3
+
+
+def fold(text):
+    """Приводит текст к нижнему регистру и заменяет «ё» на «е»."""
+    return (text or "").casefold().replace("ё", "е")
+
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """Отсекает типичное окончание у русских и английских слов."""
+    if _CYRILLIC_RE.search(token):
+        # Самое длинное подходящее окончание
+        for length in _RU_ENDING_LENGTHS:
+            if len(token) - length >= _MIN_STEM and token[-length:] in _RU_ENDINGS:
+                return token[:-length]
+        return token
+    if len(token) > _MIN_STEM + 1 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Возвращает список нормализованных токенов текста."""
+    return [stem(token) for token in _TOKEN_RE.findall(fold(text))]
+
+
+def normalize(text):
+    """Нормализованная строка для записи в индекс."""
+    return " ".join(tokenize(text))
+
+
+def build_match_expression(query):
+    """Строит выражение MATCH: все токены запроса, каждый как префикс."""
+    tokens = tokenize(query)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def is_available(using="default"):
+    """Индекс FTS5 создаётся миграцией только для SQLite."""
+    return connections[using].vendor == "sqlite"
+
+
+class Match(Lookup):
+    """``<таблица FTS5> MATCH %s`` — поиск по всем колонкам индекса.
+
+    Слева — скрытая колонка с именем таблицы FTS5 через псевдоним
+    (``U1.products_product_fts``): голый псевдоним SQLite не принимает,
+    а в подзапросах (например, в ``UPDATE ... WHERE id IN``) Django
+    переименовывает таблицу в ``U1``.
+    """
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        quote = connection.ops.quote_name
+        return f"{quote(self.lhs.alias)}.{quote(FTS_TABLE)} MATCH {rhs}", rhs_params
+
+
+class Bm25(Func):
+    """Релевантность bm25 для присоединённой таблицы FTS5 (меньше — лучше)."""
+
+    output_field = FloatField()
+
+    def __init__(self, column, weights):
+        super().__init__(column)
+        self.weights = weights
+
+    def as_sql(self, compiler, connection, **extra_context):
+        alias = connection.ops.quote_name(self.source_expressions[0].alias)
+        weights = ", ".join(str(float(weight)) for weight in self.weights)
+        return f"bm25({alias}, {weights})", []
+
+
+ProductSearchEntry._meta.get_field("name").register_lookup(Match)
+
+
+def search_products(queryset, query):
+    """Фильтрует товары по запросу и добавляет аннотацию ``search_rank``.
+
+    Индекс присоединяется одним JOIN, поэтому bm25 считается в рамках
+    одного полнотекстового запроса, а не отдельно для каждой строки.
+    Чем меньше ``search_rank``, тем релевантнее товар.
+    Для баз без FTS5 используется прежний поиск через ``icontains``.
+    """
+    if not is_available(queryset.db):
+        return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+
+    expression = build_match_expression(query)
+    if not expression:
+        return queryset.none()
+
+    return queryset.filter(search_entry__name__match=expression).annotate(
+        search_rank=Bm25(F("search_entry__name"), (NAME_WEIGHT, DESCRIPTION_WEIGHT))
+    )
+
+
+def index_product(product, using="default"):
+    """Добавляет или обновляет запись товара в индексе."""
+    index_rows([(product.pk, product.name, product.description)], using=using)
+
+
+def index_rows(rows, using="default"):
+    """Записывает в индекс строки вида ``(id, name, description)``."""
+    if not is_available(using):
+        return
+    rows = [(pk, normalize(name), normalize(description)) for pk, name, description in rows]
+    if not rows:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+            rows,
+        )
+
+
+def remove_product(product_id, using="default"):
+    """Удаляет товар из индекса."""
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def reindex_products(queryset, chunk_size=2000):
+    """Переиндексирует товары из queryset порциями по ``chunk_size``."""
+    using = queryset.db
+    rows = queryset.order_by().values_list("id", "name", "description")
+    batch = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            index_rows(batch, using=using)
+            batch = []
+    index_rows(batch, using=using)
+
+
+def rebuild_index(queryset):
+    """Полностью перестраивает индекс по товарам из queryset."""
+    using = queryset.db
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    reindex_products(queryset)
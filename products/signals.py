@@ -0,0 +1,132 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, facets, images, media, performance, search, suggest
+from .auth_cache import user_cache
+from .models import Product, Shop
+
+
+@receiver(post_save, sender=Product)
+def index_saved_product(sender, instance, using, raw=False, **kwargs):
+    """Обновляет запись товара в поисковом индексе после сохранения."""
+    if raw:
+        return
+    search.index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_deleted_product(sender, instance, using, **kwargs):
+    """Удаляет товар из поискового индекса."""
+    search.remove_product(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Product)
+def count_saved_product(sender, instance, created, using, raw=False, **kwargs):
+    """Учитывает новый товар или перенос товара в другой магазин.
+
+    Перенос распознаётся для товаров, загруженных из базы: прежний
+    магазин берётся из значений на момент загрузки.
+    """
+    if raw:
+        return
+    if created:
+        facets.add_product_count(instance.shop_id, 1, using=using)
+        return
+    old_shop_id = instance.loaded_value("shop_id")
+    if old_shop_id is not None and old_shop_id != instance.shop_id:
+        facets.add_product_count(old_shop_id, -1, using=using)
+        facets.add_product_count(instance.shop_id, 1, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, using, **kwargs):
+    """Уменьшает число товаров магазина (в транзакции удаления)."""
+    facets.add_product_count(instance.shop_id, -1, using=using)
+
+
+@receiver(post_save, sender=Product)
+def refresh_image_variants(sender, instance, using, raw=False, **kwargs):
+    """При смене изображения строит его копии после коммита транзакции."""
+    if raw or not instance.field_changed("image"):
+        return
+    if not instance.image:
+        Product.objects.using(using).filter(pk=instance.pk).update(
+            image_width=None, image_height=None
+        )
+        return
+    transaction.on_commit(
+        partial(images.update_product_variants, instance.pk, instance.image.name, using),
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Product)
+def delete_replaced_image(sender, instance, using, raw=False, **kwargs):
+    """После коммита удаляет прежнее изображение, если оно больше не нужно."""
+    if raw or not instance.field_changed("image"):
+        return
+    old_name = instance.loaded_value("image")
+    if old_name:
+        transaction.on_commit(
+            partial(media.delete_if_unreferenced, old_name, using), using=using
+        )
+
+
+@receiver(post_delete, sender=Product)
+def delete_product_image(sender, instance, using, **kwargs):
+    """После коммита удаляет изображение удалённого товара (и при удалении магазина)."""
+    if instance.image:
+        transaction.on_commit(
+            partial(media.delete_if_unreferenced, instance.image.name, using), using=using
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Shop)
+def suggest_saved_object(sender, instance, using, raw=False, **kwargs):
+    """После коммита обновляет название в индексе подсказок."""
+    if raw or (sender is Product and not instance.field_changed("name")):
+        return
+    kind = suggest.PRODUCT if sender is Product else suggest.SHOP
+    transaction.on_commit(
+        partial(suggest.object_saved, kind, instance.pk, instance.name), using=using
+    )
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Shop)
+def suggest_deleted_object(sender, instance, using, **kwargs):
+    """После коммита убирает товар или магазин из индекса подсказок."""
+    kind = suggest.PRODUCT if sender is Product else suggest.SHOP
+    transaction.on_commit(partial(suggest.object_deleted, kind, instance.pk), using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def bump_catalog_version(sender, using, **kwargs):
+    """Любое изменение каталога сбрасывает кэш сетки товаров после коммита.
+
+    Сброс внутри транзакции дал бы параллельному запросу закэшировать
+    старую сетку под новой версией.
+    """
+    transaction.on_commit(cache.bump_catalog_version, using=using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_cached_user(sender, instance, **kwargs):
+    """Изменённый пользователь (роль, пароль) заново читается из базы."""
+    user_cache.evict_user(instance.pk)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """Каждое открытое соединение учитывает SQL в замерах запроса."""
+    performance.install(connection)
@@ -0,0 +1,90 @@
+"""Хранилище изображений товаров с адресацией по содержимому.
+
+Имя файла — SHA-256 его содержимого: ``products/3f/3fa9…c1.jpg``.
+Одинаковые загрузки попадают в один и тот же файл, поэтому повторная
+загрузка не занимает места, а файл по имени никогда не меняется — его
+можно отдавать с ``Cache-Control: immutable``. Уменьшенные копии
+(:mod:`products.images`) строятся рядом и тоже общие для всех товаров
+с этим изображением.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import secrets
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+# Имя по хешу (каталог — первые два знака хеша) и производные от него
+# имена копий: ``3f/3fa9…c1.jpg``, ``3f/3fa9…c1.320w.webp``
+HASHED_NAME_RE = re.compile(r"(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.[\w-]+)+$")
+
+
+def content_hash(content):
+    """SHA-256 содержимого файла; позиция чтения возвращается в начало."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Файловое хранилище, в котором имя файла задаётся его содержимым."""
+
+    def hashed_name(self, name, content):
+        """Имя файла по содержимому в каталоге ``name`` с его расширением."""
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        digest = content_hash(content)
+        return posixpath.join(directory, digest[:2], f"{digest}{extension}")
+
+    def is_hashed(self, name):
+        """Задано ли ``name`` хешем: оригинал или копия, построенная по нему."""
+        return bool(HASHED_NAME_RE.search(name))
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        # Копии изображений однозначно определяются оригиналом и
+        # сохраняются под именем, производным от его хеша
+        if not self.is_hashed(name):
+            name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Время изменения — время последней загрузки: сборка мусора
+            # не удалит файл, ссылка на который ещё не записана в базу
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_variant(self, name, content):
+        """Сохраняет копию изображения под именем, производным от оригинала.
+
+        Имя не заменяется хешем и для оригиналов со старыми именами
+        (``products/i_1.jpg`` → ``products/i_1.320w.webp``): по нему
+        копии находит ``srcset``.
+        """
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        return super().save(name, content)
+
+    def get_available_name(self, name, max_length=None):
+        # Файл с тем же именем — тот же самый файл: суффиксы не нужны
+        return name
+
+    def _save(self, name, content):
+        # Запись во временный файл и атомарная замена: при одновременной
+        # загрузке одинаковых файлов никто не увидит недописанный файл
+        temporary = super()._save(f"{name}.{secrets.token_hex(8)}.tmp", content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+def product_image_storage():
+    """Хранилище поля ``Product.image`` (``STORAGES["product_images"]``)."""
+    return storages["product_images"]
@@ -0,0 +1,222 @@
+"""Подсказки при вводе поискового запроса: индекс префиксов в памяти процесса.
+
+Слова названий товаров и магазинов (в нижнем регистре, «ё» → «е»)
+хранятся в отсортированном списке, рядом — массив ссылок на объекты.
+Подсказки по префиксу ищутся двоичным поиском (``bisect``) без
+обращения к базе.
+
+Индекс строится при первом обращении и дальше обновляется обработчиками
+сигналов сохранения и удаления (:mod:`products.signals`) после коммита
+транзакции; изменения, пришедшие во время построения, применяются к
+индексу сразу после него. Изменения, сделанные в обход сигналов (``bulk_create``,
+``update``) или в другом процессе, видны после перезапуска процесса
+или вызова :func:`reset`.
+"""
+
+import bisect
+import re
+import sys
+import threading
+from array import array
+from itertools import chain
+
+from .search import fold
+
+PRODUCT = "product"
+SHOP = "shop"
+
+#: Сколько слов названия попадает в индекс.
+MAX_WORDS = 8
+
+#: Сколько подходящих объектов сравнивается при ранжировании.
+MATCH_LIMIT = 2000
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Больше любого символа: верхняя граница диапазона слов с префиксом
+_MAX_CHAR = "\U0010ffff"
+
+
+def words(text):
+    """Слова текста в нижнем регистре; одинаковые слова хранятся один раз."""
+    return [sys.intern(word) for word in _WORD_RE.findall(fold(text))]
+
+
+def _ref(kind, pk):
+    return pk * 2 + (kind == SHOP)
+
+
+def _kind_pk(ref):
+    return (SHOP if ref & 1 else PRODUCT), ref >> 1
+
+
+class PrefixIndex:
+    """Отсортированные слова названий и ссылки на товары и магазины."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.words = []
+        self.refs = array("q")
+        self.names = {}
+
+    def load(self, items):
+        """Заполняет пустой индекс записями ``(вид, id, название)``."""
+        pairs = []
+        for kind, pk, name in items:
+            ref = _ref(kind, pk)
+            self.names[ref] = name
+            pairs.extend((word, ref) for word in set(words(name)[:MAX_WORDS]))
+        pairs.sort()
+        self.words = [word for word, _ in pairs]
+        self.refs = array("q", (ref for _, ref in pairs))
+
+    def add(self, kind, pk, name):
+        """Добавляет объект или обновляет его название."""
+        ref = _ref(kind, pk)
+        with self.lock:
+            self._remove(ref)
+            self.names[ref] = name
+            for word in set(words(name)[:MAX_WORDS]):
+                position = bisect.bisect_right(self.words, word)
+                self.words.insert(position, word)
+                self.refs.insert(position, ref)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self._remove(_ref(kind, pk))
+
+    def _remove(self, ref):
+        name = self.names.pop(ref, None)
+        if name is None:
+            return
+        for word in set(words(name)[:MAX_WORDS]):
+            lo = bisect.bisect_left(self.words, word)
+            hi = bisect.bisect_right(self.words, word, lo)
+            try:
+                position = self.refs.index(ref, lo, hi)
+            except ValueError:
+                continue
+            del self.words[position]
+            del self.refs[position]
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.words, prefix)
+        return lo, bisect.bisect_left(self.words, prefix + _MAX_CHAR, lo)
+
+    def suggest(self, query, limit=8):
+        """``{"product": [(id, название)], "shop": [...]}`` по началу слов запроса.
+
+        Каждое слово запроса должно быть началом какого-нибудь слова
+        названия. Просматриваются записи самого редкого из них, остальные
+        проверяются по названию; ранжируются первые ``MATCH_LIMIT``
+        подходящих объектов. Выше — названия, начинающиеся с запроса,
+        затем более короткие.
+        """
+        terms = words(query)
+        if not terms:
+            return {PRODUCT: [], SHOP: []}
+        found = {}
+        with self.lock:
+            lo, hi = min((self._range(term) for term in set(terms)), key=lambda r: r[1] - r[0])
+            for position in range(lo, hi):
+                ref = self.refs[position]
+                if ref in found:
+                    continue
+                name = self.names[ref]
+                name_words = words(name)
+                if len(terms) > 1 and not all(
+                    any(word.startswith(term) for word in name_words) for term in terms
+                ):
+                    continue
+                found[ref] = (name, name_words)
+                if len(found) >= MATCH_LIMIT:
+                    break
+
+        phrase = " ".join(terms)
+        results = {PRODUCT: [], SHOP: []}
+        for ref, (name, name_words) in found.items():
+            kind, pk = _kind_pk(ref)
+            rank = (not " ".join(name_words).startswith(phrase), len(name), name, pk)
+            results[kind].append((rank, pk, name))
+        return {
+            kind: [(pk, name) for _, pk, name in sorted(matches)[:limit]]
+            for kind, matches in results.items()
+        }
+
+
+_index = None
+_build_lock = threading.Lock()
+# Изменения, пришедшие во время построения индекса (под _pending_lock)
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def get_index():
+    """Индекс текущего процесса; строится из базы при первом обращении.
+
+    Построение читает базу без блокировки изменений: изменения,
+    закоммиченные за это время, копятся в очереди и применяются к
+    готовому индексу — иначе они потерялись бы до перезапуска.
+    """
+    global _index, _pending
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                with _pending_lock:
+                    _pending = []
+                try:
+                    index = build_index()
+                    with _pending_lock:
+                        for change in _pending:
+                            change(index)
+                        _index = index
+                finally:
+                    with _pending_lock:
+                        _pending = None
+    return _index
+
+
+def build_index(using="default"):
+    """Новый индекс по всем товарам и магазинам (два запроса)."""
+    from .models import Product, Shop
+
+    index = PrefixIndex()
+    products = Product.objects.using(using).values_list("id", "name").iterator(chunk_size=5000)
+    shops = Shop.objects.using(using).values_list("id", "name")
+    index.load(
+        chain(
+            ((PRODUCT, pk, name) for pk, name in products),
+            ((SHOP, pk, name) for pk, name in shops),
+        )
+    )
+    return index
+
+
+def reset():
+    """Сбрасывает индекс: при следующем обращении он строится заново."""
+    global _index
+    with _build_lock:
+        _index = None
+
+
+def _apply(change):
+    """Применяет изменение к индексу или откладывает до конца построения.
+
+    Пока индекс не построен и не строится, изменение не нужно: при
+    построении его прочитают из базы.
+    """
+    with _pending_lock:
+        index = _index
+        if index is None:
+            if _pending is not None:
+                _pending.append(change)
+            return
+    change(index)
+
+
+def object_saved(kind, pk, name):
+    """Обновляет запись объекта, если индекс построен или строится."""
+    _apply(lambda index: index.add(kind, pk, name))
+
+
+def object_deleted(kind, pk):
+    _apply(lambda index: index.remove(kind, pk))
@@ -0,0 +1,34 @@
+from django import template
+from django.utils.html import format_html
+
+from products.images import srcset_candidates
+
+register = template.Library()
+
+
+@register.simple_tag
+def product_image(product, sizes="100vw", css_class="", loading="lazy"):
+    """Тег ``<img>`` товара с ``srcset``/``sizes`` и явными размерами.
+
+    Пока размеры оригинала неизвестны (копии не построены), выводит
+    обычный ``<img>`` с исходным файлом.
+    """
+    image = product.image
+    if not image:
+        return ""
+    if not (product.image_width and product.image_height):
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" loading="{}">',
+            image.url, css_class, product.name, loading,
+        )
+    candidates = srcset_candidates(image.name, product.image_width, product.image_height)
+    # В src — копия шириной до 640px (для браузеров без srcset)
+    src, width, height = next(
+        (c for c in reversed(candidates) if c[1] <= 640), candidates[0]
+    )
+    srcset = ", ".join(f"{url} {candidate_width}w" for url, candidate_width, _ in candidates)
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" class="{}" '
+        'alt="{}" loading="{}" decoding="async">',
+        src, srcset, sizes, width, height, css_class, product.name, loading,
+    )
@@ -0,0 +1,37 @@
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from products.management.commands.vendor_static import VENDOR_FILES
+
+register = template.Library()
+
+_VENDOR_FILES = {name: (url, integrity) for url, name, integrity in VENDOR_FILES}
+
+
+@register.simple_tag
+def vendor_asset(name):
+    """Тег ``<link>`` или ``<script>`` сторонней библиотеки из ``static/vendor``.
+
+    Если файл загружен командой ``vendor_static`` и закоммичен, он
+    раздаётся через ``{% static %}`` — с хешем в имени и сжатыми
+    копиями. Иначе подключается опубликованный файл с CDN с проверкой
+    SRI-хеша.
+    """
+    url, integrity = _VENDOR_FILES[name]
+    if finders.find(name):
+        url, integrity = static(name), None
+    if name.endswith(".css"):
+        if integrity is None:
+            return format_html('<link rel="stylesheet" href="{}">', url)
+        return format_html(
+            '<link rel="stylesheet" href="{}" integrity="{}" crossorigin="anonymous">',
+            url, integrity,
+        )
+    if integrity is None:
+        return format_html('<script src="{}" defer></script>', url)
+    return format_html(
+        '<script src="{}" integrity="{}" crossorigin="anonymous" defer></script>',
+        url, integrity,
+    )
@@ -1,8 +1,54 @@
-from django.test import TestCase
-from django.urls import reverse
-from django.contrib.auth import get_user_model
+import csv
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import BytesIO, StringIO
+from urllib.parse import urlencode
 
-from .models import Product, Shop
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.utils import ConnectionHandler
+from django.template import Context, Template
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.contrib.auth import HASH_SESSION_KEY, get_user_model
+
+from PIL import Image
+from asgiref.sync import iscoroutinefunction
+
+from benchmarks.catalog import generate_catalog
+from benchmarks.scenarios import SCENARIOS, Catalog, run_scenario
+from benchmarks.sqlite_contention import run_contention
+from shoplist import staticfiles
+from shoplist.database import PRODUCTION_PRAGMAS, replica_databases, sqlite_database
+from shoplist.routers import (
+    REPLICA_PIN_COOKIE,
+    PrimaryReplicaRouter,
+    ReplicaPinningMiddleware,
+)
+from shoplist.sessions import session_engine
+
+from . import cache as catalog_cache
+from . import admin as admin_module
+from . import auth_cache, facets, images, media, performance, search, suggest
+from . import urls as product_urls
+from .management.commands import vendor_static
+from .models import CatalogVersion, Product, Shop
+from .pagination import AFTER, encode_cursor
 
 User = get_user_model()
 
@@ -150,3 +196,1959 @@ class ViewsAccessTest(TestCase):
         response = self.client.post(reverse("product_delete", args=[self.product.id]))
         self.assertEqual(response.status_code, 403)
         self.assertEqual(Product.objects.count(), 1)
+
+
+class ProductSearchTest(TestCase):
+    """Тесты полнотекстового поиска товаров."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(self.user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.phone = Product.objects.create(
+            name="Телефон Samsung", description="Ёмкий аккумулятор", price=100, shop=self.shop
+        )
+        self.case = Product.objects.create(
+            name="Чехол", description="Чехол для телефонов", price=10, shop=self.shop
+        )
+        Product.objects.create(name="Ноутбук", price=500, shop=self.shop)
+
+    def search(self, query):
+        response = self.client.get(reverse("products"), {"q": query})
+        return [product.pk for product in response.context["products"]]
+
+    def test_normalize(self):
+        """Нормализация учитывает регистр, ё и окончания."""
+        self.assertEqual(search.normalize("Телефоны Ёлки"), "телефон елк")
+        self.assertEqual(search.normalize("PHONES"), "phone")
+
+    def test_cyrillic_case_insensitive(self):
+        """«Телефон» и «телефон» дают одинаковый результат."""
+        self.assertEqual(self.search("Телефон"), self.search("телефон"))
+        self.assertEqual(self.search("ТЕЛЕФОНЫ"), [self.phone.pk, self.case.pk])
+
+    def test_name_ranked_above_description(self):
+        """Совпадение в названии релевантнее совпадения в описании."""
+        self.assertEqual(self.search("телефон"), [self.phone.pk, self.case.pk])
+
+    def test_yo_folding(self):
+        """Поиск не различает «е» и «ё»."""
+        self.assertEqual(self.search("емкий"), [self.phone.pk])
+
+    def test_index_follows_update_and_delete(self):
+        """Индекс обновляется при изменении и удалении товара."""
+        self.phone.name = "Смартфон"
+        self.phone.description = ""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.save()
+        self.assertEqual(self.search("смартфон"), [self.phone.pk])
+        self.assertEqual(self.search("телефон"), [self.case.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.case.delete()
+        self.assertEqual(self.search("телефон"), [])
+
+    def test_punctuation_only_query(self):
+        """Запрос без слов не находит ничего и не ломает MATCH."""
+        self.assertEqual(self.search('"*'), [])
+
+
+@override_settings(PRODUCT_LIST_PAGINATION="cursor")
+class CursorPaginationTest(TestCase):
+    """Тесты курсорной пагинации списка товаров."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(self.user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        self.ids = []
+        for i in range(14):
+            product = Product.objects.create(name=f"Телефон {i}", price=100 + i, shop=self.shop)
+            self.ids.append(product.pk)
+            Product.objects.create(name=f"Телефон {i}", price=100, shop=other)
+
+    def walk(self, params):
+        """Проходит все страницы вперёд, затем назад, возвращая id товаров."""
+        forward, pages = [], []
+        response = self.client.get(reverse("products"), params)
+        while True:
+            page = response.context["page_obj"]
+            pages.append([product.pk for product in page])
+            forward += pages[-1]
+            if not page.has_next():
+                break
+            response = self.client.get(
+                reverse("products"), {**params, "cursor": page.next_cursor}
+            )
+        backward = [pages[-1]]
+        while page.has_previous():
+            response = self.client.get(
+                reverse("products"), {**params, "cursor": page.previous_cursor}
+            )
+            page = response.context["page_obj"]
+            backward.insert(0, [product.pk for product in page])
+        self.assertEqual(backward, pages)
+        return forward
+
+    def test_walk_with_shop_filter(self):
+        """Курсоры учитывают фильтр по магазину и не теряют записей."""
+        self.assertEqual(self.walk({"shop": self.shop.pk}), self.ids)
+
+    def test_walk_with_search(self):
+        """Курсоры работают и при сортировке по релевантности."""
+        ids = self.walk({"q": "телефон", "shop": self.shop.pk})
+        self.assertEqual(sorted(ids), self.ids)
+
+    def test_no_exact_count(self):
+        """Страница не выполняет COUNT(*) по всей выборке и OFFSET."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"), {"shop": self.shop.pk})
+        self.assertContains(response, "Вперёд")
+        for query in queries.captured_queries:
+            self.assertNotIn("OFFSET", query["sql"])
+            if "COUNT(" in query["sql"]:
+                self.assertIn("LIMIT", query["sql"])
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор → 404."""
+        response = self.client.get(reverse("products"), {"cursor": "мусор"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        """Курсор с подделанными значениями ключа → 404, а не ошибка сервера."""
+        cursors = [
+            ({}, encode_cursor(AFTER, ["x"])),
+            ({}, encode_cursor(AFTER, [{"x": 1}])),
+            ({}, encode_cursor(AFTER, [None])),
+            ({"sort": "price"}, encode_cursor(AFTER, ["abc", 1])),
+            ({"sort": "price"}, encode_cursor(AFTER, ["NaN", 1])),
+            ({"q": "телефон"}, encode_cursor(AFTER, ["x", 1])),
+        ]
+        with override_settings(PRODUCT_LIST_PAGINATION="cursor"):
+            for params, cursor in cursors:
+                response = self.client.get(reverse("products"), {**params, "cursor": cursor})
+                self.assertEqual(response.status_code, 404, params)
+        for params, cursor in cursors:
+            response = self.client.get(reverse("product_grid"), {**params, "cursor": cursor})
+            self.assertEqual(response.status_code, 404, params)
+            response = self.client.get(reverse("api_products"), {**params, "cursor": cursor})
+            self.assertEqual(response.status_code, 400, params)
+
+
+class PagePaginationLinksTest(TestCase):
+    """Ссылки постраничной навигации сохраняют фильтры."""
+
+    def test_links_keep_filters(self):
+        user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(user)
+        shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        for i in range(8):
+            Product.objects.create(name=f"Телефон {i}", price=100, shop=shop)
+        response = self.client.get(reverse("products"), {"q": "телефон", "shop": shop.pk})
+        self.assertContains(response, f"?q=%D1%82%D0%B5%D0%BB%D0%B5%D1%84%D0%BE%D0%BD&amp;shop={shop.pk}&amp;page=2")
+
+
+class ImageVariantsTest(TestCase):
+    """Тесты уменьшенных копий изображений товаров."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+
+    def make_image(self, size=(800, 400)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "red").save(buffer, "PNG")
+        return SimpleUploadedFile("photo.png", buffer.getvalue(), content_type="image/png")
+
+    def test_variants_built_on_save(self):
+        """При сохранении товара строятся копии не шире оригинала."""
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(
+                name="Телефон", price=100, shop=self.shop, image=self.make_image()
+            )
+        product.refresh_from_db()
+        self.assertEqual((product.image_width, product.image_height), (800, 400))
+        storage = images.get_storage()
+        name = product.image.name
+        self.assertTrue(storage.exists(images.variant_name(name, 320)))
+        self.assertTrue(storage.exists(images.variant_name(name, 640)))
+        self.assertFalse(storage.exists(images.variant_name(name, 1280)))
+        with storage.open(images.variant_name(name, 320)) as f:
+            self.assertEqual(Image.open(f).size, (320, 160))
+
+    def test_template_tag_srcset(self):
+        """Тег выводит srcset, sizes и явные размеры."""
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(
+                name="Телефон", price=100, shop=self.shop, image=self.make_image()
+            )
+        product.refresh_from_db()
+        html = Template(
+            '{% load image_tags %}{% product_image product sizes="33vw" %}'
+        ).render(Context({"product": product}))
+        self.assertIn("320w, ", html)
+        self.assertIn("800w", html)
+        self.assertIn('sizes="33vw"', html)
+        self.assertIn('width="640" height="320"', html)
+
+    def test_backfill_command(self):
+        """Команда строит копии и размеры для существующих изображений."""
+        product = Product.objects.create(name="Телефон", price=100, shop=self.shop)
+        Product.objects.filter(pk=product.pk).update(
+            image=images.get_storage().save("products/old.png", self.make_image())
+        )
+        updated_at = Product.objects.get(pk=product.pk).updated_at
+        call_command("generate_image_variants", workers=1, stdout=StringIO())
+        product.refresh_from_db()
+        self.assertEqual(product.image_width, 800)
+        # Страница товара меняется: ETag по updated_at должен смениться
+        self.assertGreater(product.updated_at, updated_at)
+        self.assertTrue(
+            images.get_storage().exists(images.variant_name(product.image.name, 640))
+        )
+
+    def test_backfill_keeps_legacy_variant_names(self):
+        """Копии старого имени лежат там, куда ведёт srcset, а не под хешем."""
+        os.makedirs(os.path.join(self.media_root, "products"))
+        with open(os.path.join(self.media_root, "products", "i_1.png"), "wb") as f:
+            f.write(self.make_image().read())
+        product = Product.objects.create(name="Телефон", price=100, shop=self.shop)
+        Product.objects.filter(pk=product.pk).update(image="products/i_1.png")
+        call_command("generate_image_variants", workers=1, stdout=StringIO())
+        product.refresh_from_db()
+        storage = images.get_storage()
+        for url, width, _ in images.srcset_candidates(product.image.name, 800, 400):
+            name = url[len(settings.MEDIA_URL):]
+            self.assertTrue(storage.exists(name), name)
+        self.assertTrue(storage.exists("products/i_1.320w.webp"))
+
+
+class ImageStorageTest(TestCase):
+    """Хранилище изображений по хешу содержимого и перевод старых файлов."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+
+    def image_bytes(self, color="red"):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 200), color).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def upload(self, name, color="red"):
+        return SimpleUploadedFile(name, self.image_bytes(color), content_type="image/png")
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, files in os.walk(self.media_root)
+            for name in files
+        )
+
+    def test_identical_uploads_share_file(self):
+        first = Product.objects.create(
+            name="Телефон", price=1, shop=self.shop, image=self.upload("a.png")
+        )
+        second = Product.objects.create(
+            name="Чехол", price=1, shop=self.shop, image=self.upload("b.PNG")
+        )
+        other = Product.objects.create(
+            name="Лампа", price=1, shop=self.shop, image=self.upload("a.png", "blue")
+        )
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertTrue(images.get_storage().is_hashed(first.image.name))
+        self.assertRegex(first.image.name, r"^products/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual(len(self.stored_files()), 2)
+
+    def test_dedupe_command(self):
+        legacy = os.path.join(self.media_root, "products")
+        os.makedirs(legacy)
+        for name in ("i_7.png", "i_7_ZUmxxEQ.png"):
+            with open(os.path.join(legacy, name), "wb") as f:
+                f.write(self.image_bytes())
+        products = [
+            Product.objects.create(
+                name=f"Телефон {name}", price=1, shop=self.shop, image=f"products/{name}"
+            )
+            for name in ("i_7.png", "i_7_ZUmxxEQ.png")
+        ]
+
+        out = StringIO()
+        call_command("dedupe_product_images", dry_run=True, stdout=out)
+        self.assertIn("Файлов: 2 → 1", out.getvalue())
+        self.assertEqual(Product.objects.filter(image="products/i_7.png").count(), 1)
+
+        call_command("dedupe_product_images", delete_old=True, stdout=StringIO())
+        names = {p.image.name for p in Product.objects.filter(pk__in=[p.pk for p in products])}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(images.get_storage().is_hashed(name))
+        self.assertEqual(
+            self.stored_files(), sorted([name, images.variant_name(name, 320)])
+        )
+        self.assertEqual(Product.objects.get(pk=products[0].pk).image_width, 400)
+
+
+class OrphanedImageTest(TestCase):
+    """Удаление файлов изображений, на которые не ссылается ни один товар."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+
+    def upload(self, color="red"):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 200), color).save(buffer, "PNG")
+        return SimpleUploadedFile("a.png", buffer.getvalue(), content_type="image/png")
+
+    def create(self, color="red", shop=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                name="Телефон", price=1, shop=shop or self.shop, image=self.upload(color)
+            )
+
+    def exists(self, name):
+        return images.get_storage().exists(name)
+
+    def backdate(self, name):
+        """Файл старше периода ожидания удаления."""
+        old = time.time() - 2 * media.DELETE_GRACE_SECONDS
+        os.utime(images.get_storage().path(name), (old, old))
+
+    def test_replaced_image_deleted_on_commit(self):
+        product = self.create("red")
+        shared = self.create("red")
+        old_name = product.image.name
+        self.assertTrue(self.exists(images.variant_name(old_name, 320)))
+        self.backdate(old_name)
+
+        product.image = self.upload("blue")
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        # Тот же файл ещё у другого товара
+        self.assertTrue(self.exists(old_name))
+
+        shared.image = self.upload("green")
+        with self.captureOnCommitCallbacks(execute=True):
+            shared.save()
+        self.assertFalse(self.exists(old_name))
+        self.assertFalse(self.exists(images.variant_name(old_name, 320)))
+        self.assertTrue(self.exists(product.image.name))
+
+    def test_shop_delete_removes_images(self):
+        other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        name = self.create("red", shop=other).image.name
+        self.backdate(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertFalse(self.exists(name))
+
+    def test_recent_upload_survives_replacement(self):
+        product = self.create("red")
+        old_name = product.image.name
+        self.backdate(old_name)
+        # Тот же файл только что загружен для товара, ещё не сохранённого в базе
+        self.assertEqual(images.get_storage().save("products/a.png", self.upload("red")), old_name)
+
+        product.image = self.upload("blue")
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertTrue(self.exists(old_name))
+        self.assertTrue(self.exists(images.variant_name(old_name, 320)))
+        self.assertEqual(media.delete_if_unreferenced(old_name, grace=0)[0], old_name)
+
+    def test_garbage_collector(self):
+        kept = self.create("red").image.name
+        storage = images.get_storage()
+        orphan = storage.save("products/a.png", self.upload("blue"))
+        recent = storage.save("products/b.png", self.upload("green"))
+        old = time.time() - 2 * 3600
+        for name in (kept, images.variant_name(kept, 320), orphan):
+            os.utime(storage.path(name), (old, old))
+
+        out = StringIO()
+        call_command("delete_orphaned_images", dry_run=True, min_age=1, stdout=out)
+        self.assertIn(orphan, out.getvalue())
+        self.assertTrue(self.exists(orphan))
+
+        call_command("delete_orphaned_images", min_age=1, workers=2, stdout=StringIO())
+        self.assertFalse(self.exists(orphan))
+        # Моложе периода ожидания
+        self.assertTrue(self.exists(recent))
+        self.assertTrue(self.exists(kept))
+        self.assertTrue(self.exists(images.variant_name(kept, 320)))
+
+    def test_upload_of_existing_file_refreshes_mtime(self):
+        storage = images.get_storage()
+        name = storage.save("products/a.png", self.upload())
+        os.utime(storage.path(name), (0, 0))
+        storage.save("products/b.png", self.upload())
+        self.assertGreater(os.path.getmtime(storage.path(name)), 0)
+
+
+@override_settings(
+    STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"]
+)
+class StaticFilesTest(TestCase):
+    """Сборка статики с хешами и сжатыми копиями и её раздача."""
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, "css"))
+        os.makedirs(os.path.join(self.source, "img"))
+        with open(os.path.join(self.source, "css", "site.css"), "w") as f:
+            f.write('.logo { background: url("../img/dot.svg"); }\n' * 50)
+        with open(os.path.join(self.source, "img", "dot.svg"), "w") as f:
+            f.write('<svg xmlns="http://www.w3.org/2000/svg"></svg>')
+        settings_override = override_settings(STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(os.path.join(self.root, "staticfiles.json")) as f:
+            self.hashed = json.load(f)["paths"]["css/site.css"]
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), "rb") as f:
+            return f.read()
+
+    def test_collectstatic_hashes_and_compresses(self):
+        self.assertRegex(self.hashed, r"^css/site\.[0-9a-f]{12}\.css$")
+        content = self.read(self.hashed)
+        self.assertRegex(content.decode(), r"img/dot\.[0-9a-f]{12}\.svg")
+        self.assertEqual(gzip.decompress(self.read(f"{self.hashed}.gz")), content)
+        if staticfiles.brotli is not None:
+            self.assertEqual(staticfiles.brotli.decompress(self.read(f"{self.hashed}.br")), content)
+
+    def test_serves_compressed_immutable(self):
+        response = self.client.get(f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="br;q=0, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Cache-Control"], staticfiles.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(b"".join(response.streaming_content), self.read(f"{self.hashed}.gz"))
+
+        response = self.client.get(f"/static/{self.hashed}")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), self.read(self.hashed))
+
+    async def test_serves_without_sync_chain(self):
+        async def get_response(request):
+            return HttpResponse("дальше по цепочке")
+
+        middleware = staticfiles.StaticFilesMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        factory = RequestFactory()
+        response = await middleware(
+            factory.get(f"/static/{self.hashed}", HTTP_ACCEPT_ENCODING="gzip")
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        response.close()
+        response = await middleware(factory.get("/products/"))
+        self.assertEqual(response.content.decode(), "дальше по цепочке")
+
+    def test_unhashed_and_missing_files(self):
+        response = self.client.get("/static/css/site.css")
+        self.assertEqual(response["Cache-Control"], staticfiles.REVALIDATE_CACHE_CONTROL)
+        response.close()
+        self.assertEqual(self.client.get("/static/css/missing.css").status_code, 404)
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+    def test_cdn_assets_match_vendored_hashes(self):
+        # Пока static/vendor/ не загружен, Bootstrap подключается с CDN
+        response = self.client.get(reverse("login"))
+        for url, _, expected in vendor_static.VENDOR_FILES:
+            self.assertContains(response, url)
+            self.assertContains(response, f'integrity="{expected}"')
+
+    def test_vendored_assets_served_from_static(self):
+        for _, name, _ in vendor_static.VENDOR_FILES:
+            path = os.path.join(self.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("/* vendor */\n")
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(os.path.join(self.root, "staticfiles.json")) as f:
+            hashed = json.load(f)["paths"]
+        html = self.client.get(reverse("login")).content.decode()
+        self.assertNotIn("cdn.jsdelivr.net", html)
+        for _, name, _ in vendor_static.VENDOR_FILES:
+            self.assertIn(f"{settings.STATIC_URL}{hashed[name]}", html)
+
+    def test_vendor_integrity(self):
+        self.assertEqual(
+            vendor_static.integrity(b""),
+            "sha384-OLBgp1GsljhM2TJ+sbHjaiH9txEUvgdDTAzHv2P24donTt6/529l+9Ua0vFImLlb",
+        )
+        self.assertEqual(
+            vendor_static.SOURCE_MAP_RE.sub(b"\n", b"a{}\n/*# sourceMappingURL=a.css.map */"),
+            b"a{}\n",
+        )
+
+
+class ProductGridCacheTest(TestCase):
+    """Тесты кэша сетки товаров."""
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(
+            username="manager",
+            email="manager@test.com",
+            password="managerpass",
+            role="sales_executive",
+        )
+        self.client.force_login(self.manager)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.product = Product.objects.create(name="Телефон", price=100, shop=self.shop)
+
+    def get_products(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"), params or {})
+        product_sql = [
+            q["sql"]
+            for q in queries.captured_queries
+            if '"products_product"."name"' in q["sql"] or "COUNT(" in q["sql"]
+        ]
+        return response, product_sql
+
+    def test_second_request_hits_cache(self):
+        """Повторный запрос не выбирает и не считает товары."""
+        _, first = self.get_products()
+        response, second = self.get_products()
+        self.assertTrue(first)
+        self.assertEqual(second, [])
+        self.assertContains(response, "Телефон")
+        stats = catalog_cache.grid_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_key_depends_on_filters(self):
+        """Разные фильтры кэшируются раздельно."""
+        self.get_products()
+        response, queries = self.get_products({"q": "ноутбук"})
+        self.assertTrue(queries)
+        self.assertContains(response, "Товары не найдены")
+
+    def test_writes_invalidate_cache(self):
+        """Создание, изменение и удаление товара сразу видны в списке."""
+        self.get_products()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("product_add"),
+                {"name": "Ноутбук", "description": "", "price": "500", "shop": self.shop.id},
+            )
+        self.assertContains(self.get_products()[0], "Ноутбук")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("product_edit", args=[self.product.pk]),
+                {"name": "Смартфон", "description": "", "price": "100", "shop": self.shop.id},
+            )
+        response = self.get_products()[0]
+        self.assertContains(response, "Смартфон")
+        self.assertNotContains(response, "Телефон")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("product_delete", args=[self.product.pk]))
+        self.assertNotContains(self.get_products()[0], "Смартфон")
+
+    def test_version_shared_through_database(self):
+        """Изменение в другом процессе (мимо его кэша) сбрасывает сетку и ETag."""
+        url = reverse("products")
+        response = self.client.get(url)
+        # Другой процесс: свой кэш, общая база
+        Product.objects.filter(pk=self.product.pk).update(name="Смартфон")
+        CatalogVersion.objects.update(value=F("value") + 1)
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, "Смартфон")
+
+    def test_shop_change_invalidates_cache(self):
+        """Изменение магазина тоже сбрасывает кэш."""
+        version = catalog_cache.catalog_version()
+        self.shop.name = "Новый магазин"
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.shop.save()
+            # Версия меняется только после коммита транзакции
+            self.assertEqual(catalog_cache.catalog_version(), version)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(catalog_cache.catalog_version(), version)
+
+    def test_stats_staff_only(self):
+        """Счётчики кэша доступны только персоналу."""
+        response = self.client.get(reverse("catalog_cache_stats"))
+        self.assertEqual(response.status_code, 403)
+        self.manager.is_staff = True
+        self.manager.save()
+        response = self.client.get(reverse("catalog_cache_stats"))
+        self.assertEqual(response.json()["misses"], 0)
+
+
+class ConditionalGetTest(TestCase):
+    """Тесты ответов 304 Not Modified."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.manager = User.objects.create_user(
+            username="manager",
+            email="manager@test.com",
+            password="managerpass",
+            role="sales_executive",
+        )
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.product = Product.objects.create(name="Телефон", price=100, shop=self.shop)
+
+    def revalidate(self, url, response):
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        catalog_sql = [
+            q["sql"] for q in queries.captured_queries if "products_product" in q["sql"]
+        ]
+        return revalidated, catalog_sql
+
+    def test_list_not_modified(self):
+        """Неизменённый список → 304 за один запрос к каталогу."""
+        self.client.force_login(self.user)
+        url = reverse("products")
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        revalidated, catalog_sql = self.revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(len(catalog_sql), 1)
+
+    def test_list_modified_after_delete(self):
+        """Удаление товара меняет ETag списка."""
+        self.client.force_login(self.user)
+        url = reverse("products")
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Ноутбук", price=500, shop=self.shop).delete()
+        self.assertEqual(self.revalidate(url, response)[0].status_code, 200)
+
+    def test_if_modified_since_alone_never_304(self):
+        """Без ETag удаление товара или другая роль не дают 304 по дате."""
+        self.client.force_login(self.manager)
+        url = reverse("products")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Ноутбук", price=500, shop=self.shop).delete()
+        since = "Fri, 01 Jan 2100 00:00:00 GMT"
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+        self.client.force_login(self.user)
+        detail = reverse("product_detail", args=[self.product.pk])
+        self.assertEqual(
+            self.client.get(detail, HTTP_IF_MODIFIED_SINCE=since).status_code, 200
+        )
+
+    def test_detail_not_modified_until_edit(self):
+        """Страница товара → 304, пока товар или магазин не изменились."""
+        self.client.force_login(self.user)
+        url = reverse("product_detail", args=[self.product.pk])
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response)[0].status_code, 304)
+        self.shop.address = "ул. Мира, 2"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.save()
+        self.assertEqual(self.revalidate(url, response)[0].status_code, 200)
+
+    def test_relogin_changes_etag(self):
+        """После повторного входа страница с прежним токеном CSRF не отдаётся 304."""
+        credentials = {"username": "user@test.com", "password": "userpass"}
+        self.client.post(reverse("login"), credentials)
+        url = reverse("products")
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response)[0].status_code, 304)
+        old_token = self.client.cookies[settings.CSRF_COOKIE_NAME].value
+        self.client.post(reverse("logout"))
+        self.client.post(reverse("login"), credentials)
+        self.assertNotEqual(self.client.cookies[settings.CSRF_COOKIE_NAME].value, old_token)
+        revalidated = self.revalidate(url, response)[0]
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertNotEqual(revalidated["ETag"], response["ETag"])
+
+    def test_etag_varies_by_role(self):
+        """ETag зависит от роли: у менеджера на странице есть кнопки."""
+        url = reverse("product_detail", args=[self.product.pk])
+        self.client.force_login(self.user)
+        user_etag = self.client.get(url)["ETag"]
+        self.client.force_login(self.manager)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=user_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], user_etag)
+
+
+class ImportCatalogTest(TestCase):
+    """Тесты команды import_catalog."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+
+    def write(self, name, content):
+        path = f"{self.tmp}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command("import_catalog", path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import(self):
+        """CSV: товары создаются, новые магазины заводятся, ошибки пропускаются."""
+        path = self.write(
+            "catalog.csv",
+            "sku,name,description,price,shop,shop_address\n"
+            "A-1,Телефон,Смартфон,100.50,Магазин №1,\n"
+            ",Чехол,,10,Магазин №2,ул. Мира 2\n"
+            "A-2,Ноутбук,,0,Магазин №1,\n",
+        )
+        out, err = self.run_import(path, batch_size=1)
+        self.assertIn("Импортировано строк: 2, пропущено: 1", out)
+        self.assertIn("Строка 4", err)
+        self.assertEqual(Product.objects.get(sku="A-1").shop, self.shop)
+        self.assertEqual(Shop.objects.get(name="Магазин №2").address, "ул. Мира 2")
+        self.assertEqual(Shop.objects.get(name="Магазин №2").product_count, 1)
+        self.assertEqual(
+            list(search.search_products(Product.objects.all(), "чехол")),
+            [Product.objects.get(name="Чехол")],
+        )
+
+    def test_jsonl_upsert_by_sku(self):
+        """JSON Lines: товар с существующим артикулом обновляется."""
+        Product.objects.create(sku="A-1", name="Телефон", price=100, shop=self.shop)
+        path = self.write(
+            "catalog.jsonl",
+            '{"sku": "A-1", "name": "Смартфон", "price": 90, "shop": "Магазин №1"}\n'
+            '{"sku": "A-3", "name": "Планшет", "price": "300", "shop": "Магазин №1"}\n'
+            "не json\n",
+        )
+        out, err = self.run_import(path)
+        self.assertIn("пропущено: 1", out)
+        self.assertEqual(Product.objects.count(), 2)
+        product = Product.objects.get(sku="A-1")
+        self.assertEqual((product.name, product.price), ("Смартфон", 90))
+        self.assertEqual(
+            list(search.search_products(Product.objects.all(), "смартфон")), [product]
+        )
+
+    def test_invalid_values_skip_only_their_rows(self):
+        """Нестроковые названия и слишком большие цены — ошибка строки, а не импорта."""
+        path = self.write(
+            "catalog.jsonl",
+            '{"name": 12345, "price": 10, "shop": "Магазин №1"}\n'
+            '{"name": "Чехол", "price": 10, "shop": 7}\n'
+            '{"name": {"ru": "Чехол"}, "price": 10, "shop": "Магазин №1"}\n'
+            '{"name": "Яхта", "price": "100000000", "shop": "Магазин №1"}\n'
+            '{"name": "Яхта", "price": "99999999.999", "shop": "Магазин №1"}\n'
+            '{"name": "Скрепка", "price": "0.001", "shop": "Магазин №1"}\n'
+            '{"name": "Самолёт", "price": "99999999.99", "shop": "Магазин №1"}\n',
+        )
+        out, err = self.run_import(path)
+        self.assertIn("Импортировано строк: 3, пропущено: 4", out)
+        for line in (3, 4, 5, 6):
+            self.assertIn(f"Строка {line}", err)
+        self.assertEqual(Product.objects.get(name="12345").shop, self.shop)
+        self.assertEqual(Product.objects.get(name="Чехол").shop.name, "7")
+        self.assertEqual(Product.objects.get(name="Самолёт").price, Decimal("99999999.99"))
+
+
+class ProductExportTest(TestCase):
+    """Тесты потоковой выгрузки каталога."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        self.phone = Product.objects.create(
+            sku="A-1", name="Телефон", price="100.50", shop=self.shop
+        )
+        Product.objects.create(name="Телефон", price=90, shop=other)
+        Product.objects.create(name="Ноутбук", price=500, shop=self.shop)
+
+    def export(self, params):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("product_export"), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_with_filters(self):
+        """CSV учитывает фильтры q и shop."""
+        rows = list(csv.DictReader(self.export({"q": "телефон", "shop": self.shop.pk}).splitlines()))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["sku"], "A-1")
+        self.assertEqual(rows[0]["price"], "100.50")
+        self.assertEqual(rows[0]["shop_name"], "Магазин №1")
+
+    def test_jsonl(self):
+        """JSON Lines: по объекту на строку, в порядке id."""
+        lines = self.export({"format": "jsonl"}).splitlines()
+        names = [json.loads(line)["name"] for line in lines]
+        self.assertEqual(names, ["Телефон", "Телефон", "Ноутбук"])
+
+    def test_unknown_format(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("product_export"), {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_required(self):
+        response = self.client.get(reverse("product_export"))
+        self.assertEqual(response.status_code, 302)
+
+
+class ProductApiTest(TestCase):
+    """Тесты JSON API каталога."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(self.user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.products = [
+            Product.objects.create(name=f"Телефон {i}", price=100 + i, shop=self.shop)
+            for i in range(5)
+        ]
+
+    def test_list_fields_and_cursor(self):
+        """Выбор полей и проход по страницам через курсор."""
+        url = reverse("api_products")
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url, {"fields": "id,price,shop_name", "limit": 2}).json()
+        catalog_sql = [q["sql"] for q in queries.captured_queries if "products_product" in q["sql"]]
+        self.assertEqual(len(catalog_sql), 1)
+        self.assertIn("JOIN", catalog_sql[0])
+        self.assertEqual(
+            data["results"][0],
+            {"id": self.products[0].pk, "price": "100.00", "shop_name": "Магазин №1"},
+        )
+        ids = [row["id"] for row in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            ids += [row["id"] for row in data["results"]]
+        self.assertEqual(ids, [p.pk for p in self.products])
+
+    def test_search_filter(self):
+        """API принимает те же фильтры, что и список товаров."""
+        data = self.client.get(reverse("api_products"), {"q": "телефоны", "fields": "id"}).json()
+        self.assertEqual(len(data["results"]), 5)
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("api_products"), {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json()["error"])
+
+    def test_detail(self):
+        product = self.products[0]
+        url = reverse("api_product_detail", args=[product.pk])
+        self.assertEqual(
+            self.client.get(url, {"fields": "name,image"}).json(),
+            {"name": "Телефон 0", "image": None},
+        )
+        url = reverse("api_product_detail", args=[product.pk + 100])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_shops(self):
+        data = self.client.get(reverse("api_shops")).json()
+        self.assertEqual([shop["name"] for shop in data["results"]], ["Магазин №1"])
+
+    def test_anonymous_forbidden(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("api_shops")).status_code, 403)
+
+
+class AsyncApiTest(TestCase):
+    """Тесты асинхронных представлений каталога."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.products = [
+            Product.objects.create(name=f"Телефон {i}", price=100 + i, shop=self.shop)
+            for i in range(3)
+        ]
+        Product.objects.create(name="Ноутбук", price=500, shop=self.shop)
+
+    async def test_list_and_cursor(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("async_api_products"), {"fields": "id,name", "limit": 3}
+        )
+        data = response.json()
+        self.assertEqual(len(data["results"]), 3)
+        response = await self.async_client.get(data["next"])
+        self.assertEqual(response.json()["results"][0]["name"], "Ноутбук")
+
+    async def test_detail(self):
+        await self.async_client.aforce_login(self.user)
+        product = self.products[0]
+        response = await self.async_client.get(
+            reverse("async_api_product_detail", args=[product.pk]), {"fields": "name,price"}
+        )
+        self.assertEqual(response.json(), {"name": "Телефон 0", "price": "100.00"})
+        response = await self.async_client.get(
+            reverse("async_api_product_detail", args=[product.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_search_with_count(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("async_api_search"), {"q": "телефон", "limit": 2}
+        )
+        data = response.json()
+        self.assertEqual((data["count"], data["count_is_capped"]), (3, False))
+        self.assertEqual(len(data["results"]), 2)
+        response = await self.async_client.get(reverse("async_api_search"))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_anonymous_forbidden(self):
+        response = await self.async_client.get(reverse("async_api_products"))
+        self.assertEqual(response.status_code, 403)
+
+
+class DatabaseProfileTest(SimpleTestCase):
+    """Профиль production для SQLite: PRAGMA и конкурентная запись."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def database(self, profile):
+        return sqlite_database(os.path.join(self.directory, f"{profile}.sqlite3"), profile)
+
+    def test_production_pragmas(self):
+        handler = ConnectionHandler({"default": {}, "profile": self.database("production")})
+        db = handler["profile"]
+        self.addCleanup(db.close)
+        with db.cursor() as cursor:
+            values = {}
+            for name in PRODUCTION_PRAGMAS:
+                cursor.execute(f"PRAGMA {name}")
+                values[name] = cursor.fetchone()[0]
+        self.assertEqual(values["journal_mode"], "wal")
+        self.assertEqual(values["synchronous"], 1)  # NORMAL
+        self.assertEqual(values["temp_store"], 2)  # MEMORY
+        self.assertEqual(values["busy_timeout"], PRODUCTION_PRAGMAS["busy_timeout"])
+        self.assertEqual(values["cache_size"], PRODUCTION_PRAGMAS["cache_size"])
+        self.assertEqual(values["mmap_size"], PRODUCTION_PRAGMAS["mmap_size"])
+        self.assertEqual(db.transaction_mode, "IMMEDIATE")
+        self.assertEqual(db.settings_dict["CONN_MAX_AGE"], 60)
+        self.assertTrue(db.settings_dict["CONN_HEALTH_CHECKS"])
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ImproperlyConfigured):
+            sqlite_database("db.sqlite3", "staging")
+
+    def test_concurrent_writers_are_not_locked_out(self):
+        """Транзакции «прочитать — изменить» не получают «database is locked»."""
+        result = run_contention(self.database("production"), readers=4, writers=4, duration=0.5)
+        self.assertEqual(result["write_errors"], 0)
+        self.assertEqual(result["read_errors"], 0)
+        self.assertGreater(result["writes"], 0)
+        self.assertGreater(result["reads"], 0)
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    """Чтение каталога из реплик и закрепление за основной базой после записи."""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter({"replica_1": 1, "replica_2": 3})
+        self.factory = RequestFactory()
+
+    def run_request(self, request, view):
+        return ReplicaPinningMiddleware(view)(request)
+
+    def test_replica_settings(self):
+        databases, weights = replica_databases("/tmp/r1.sqlite3, /tmp/r2.sqlite3=3")
+        self.assertEqual(weights, {"replica_1": 1, "replica_2": 3})
+        self.assertEqual(databases["replica_2"]["NAME"], "/tmp/r2.sqlite3")
+        self.assertEqual(databases["replica_1"]["TEST"], {"MIRROR": "default"})
+
+    def test_weighted_round_robin(self):
+        seen = []
+
+        def view(request):
+            seen.extend(self.router.db_for_read(Product) for _ in range(8))
+            return HttpResponse()
+
+        self.run_request(self.factory.get("/"), view)
+        self.assertEqual(seen.count("replica_1"), 2)
+        self.assertEqual(seen.count("replica_2"), 6)
+        # Реплики чередуются, а не идут пачками
+        self.assertNotEqual(seen[:2], ["replica_2", "replica_2"])
+
+    def test_primary_outside_request_and_for_auth(self):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(User))
+            seen.append(self.router.db_for_read(Session))
+            seen.append(self.router.db_for_write(Shop))
+            return HttpResponse()
+
+        self.run_request(self.factory.get("/"), view)
+        self.assertEqual(seen, ["default", "default", "default"])
+
+    def test_read_your_writes(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            self.router.db_for_write(Product)
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+
+        response = self.run_request(self.factory.get("/"), view)
+        self.assertTrue(seen[0].startswith("replica_"))
+        self.assertEqual(seen[1], "default")
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_pinned_requests(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+
+        response = self.run_request(self.factory.post("/"), view)
+        request = self.factory.get("/")
+        request.COOKIES[REPLICA_PIN_COOKIE] = "1"
+        self.run_request(request, view)
+        self.assertEqual(seen, ["default", "default"])
+        # POST без записи в каталог не закрепляет клиента
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_no_replicas(self):
+        router = PrimaryReplicaRouter({})
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Product))
+            return HttpResponse()
+
+        self.run_request(self.factory.get("/"), view)
+        self.assertEqual(seen, ["default"])
+
+
+class PriceFilterSortTest(TestCase):
+    """Фильтр по диапазону цен и сортировка списка товаров."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        # Много одинаковых цен: порядок внутри цены задаёт только id
+        self.products = [
+            Product.objects.create(name=f"Телефон {i}", price=100 + i % 3, shop=self.shop)
+            for i in range(15)
+        ]
+
+    def ids(self, params):
+        response = self.client.get(reverse("products"), params)
+        return [product.pk for product in response.context["page_obj"]]
+
+    def walk_pages(self, params):
+        ids, page = [], 1
+        while True:
+            response = self.client.get(reverse("products"), {**params, "page": page})
+            page_obj = response.context["page_obj"]
+            ids += [product.pk for product in page_obj]
+            if not page_obj.has_next():
+                return ids
+            page += 1
+
+    def walk_cursor(self, params):
+        ids, cursor = [], None
+        with override_settings(PRODUCT_LIST_PAGINATION="cursor"):
+            while True:
+                query = {**params, "cursor": cursor} if cursor else params
+                page_obj = self.client.get(reverse("products"), query).context["page_obj"]
+                ids += [product.pk for product in page_obj]
+                if not page_obj.has_next():
+                    return ids
+                cursor = page_obj.next_cursor
+
+    def test_price_range(self):
+        expected = [p.pk for p in self.products if 101 <= p.price <= 101]
+        self.assertEqual(self.ids({"min_price": "101", "max_price": "101.00"}), expected[:6])
+        self.assertEqual(
+            self.walk_pages({"min_price": "101.5"}),
+            [p.pk for p in self.products if p.price >= 102],
+        )
+
+    def test_sort_stable_across_pages(self):
+        """Товары с равной ценой не теряются и не повторяются между страницами."""
+        by_price = sorted(self.products, key=lambda p: (p.price, p.pk))
+        ascending = [p.pk for p in by_price]
+        descending = ascending[::-1]
+        for walk in (self.walk_pages, self.walk_cursor):
+            self.assertEqual(walk({"sort": "price"}), ascending)
+            self.assertEqual(walk({"sort": "-price"}), descending)
+            self.assertEqual(walk({"sort": "newest"}), sorted(ascending, reverse=True))
+
+    def test_invalid_values_ignored(self):
+        default = self.ids({})
+        for params in (
+            {"min_price": "дёшево"},
+            {"max_price": "-5"},
+            {"min_price": "NaN"},
+            {"sort": "name"},
+        ):
+            self.assertEqual(self.ids(params), default, params)
+
+    def test_links_keep_filters(self):
+        response = self.client.get(
+            reverse("products"), {"min_price": "100", "max_price": "102", "sort": "-price"}
+        )
+        self.assertContains(response, "?min_price=100&amp;max_price=102&amp;sort=-price&amp;page=2")
+        self.assertContains(response, '<option value="-price" selected>')
+
+
+class BulkProductUpdateTest(TestCase):
+    """Массовое изменение цены и магазина одним UPDATE."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            username="manager", email="manager@test.com", password="pass",
+            role="sales_executive",
+        )
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        self.phones = [
+            Product.objects.create(name=f"Телефон {i}", price=100 + i, shop=self.shop)
+            for i in range(3)
+        ]
+        self.kettle = Product.objects.create(name="Чайник", price=50, shop=self.shop)
+        self.url = reverse("product_bulk")
+        self.client.force_login(self.manager)
+
+    def post(self, button="apply", **data):
+        return self.client.post(self.url, {**data, button: "1"})
+
+    def prices(self):
+        return dict(Product.objects.values_list("name", "price"))
+
+    def test_percent_change_is_single_update(self):
+        version = catalog_cache.catalog_version()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(
+            connection
+        ) as queries:
+            response = self.post(q="телефон", action="percent", value="-10")
+        updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, f"{reverse('products')}?{urlencode({'q': 'телефон'})}")
+        prices = self.prices()
+        self.assertEqual(prices["Телефон 1"], Decimal("90.90"))
+        self.assertEqual(prices["Чайник"], Decimal("50"))
+        self.assertNotEqual(catalog_cache.catalog_version(), version)
+        phone = Product.objects.get(pk=self.phones[0].pk)
+        self.assertGreater(phone.updated_at, self.phones[0].updated_at)
+
+    def test_amount_change_by_price_range(self):
+        self.post(min_price="101", max_price="102", action="amount", value="5")
+        prices = self.prices()
+        self.assertEqual(prices["Телефон 0"], Decimal("100"))
+        self.assertEqual(prices["Телефон 1"], Decimal("106"))
+        self.assertEqual(prices["Телефон 2"], Decimal("107"))
+
+    def test_non_positive_price_rejected(self):
+        response = self.post(action="amount", value="-50")
+        self.assertContains(response, "Цена должна быть больше 0.")
+        self.assertEqual(self.prices()["Чайник"], Decimal("50"))
+
+    def test_preview_changes_nothing(self):
+        response = self.post("preview", shop=self.shop.pk, action="percent", value="50")
+        self.assertContains(response, "Будет изменено товаров: 4")
+        self.assertEqual(self.prices()["Чайник"], Decimal("50"))
+
+    def test_move_updates_shop_counts(self):
+        self.post(q="телефон", action="move", target_shop=self.other.pk)
+        self.assertEqual(Product.objects.filter(shop=self.other).count(), 3)
+        self.shop.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.shop.product_count, self.other.product_count), (1, 3))
+        # Товары остаются в поиске
+        self.assertEqual(search.search_products(Product.objects.all(), "телефон").count(), 3)
+
+    def test_move_requires_shop(self):
+        response = self.post(action="move")
+        self.assertContains(response, "Выберите магазин.")
+
+    def test_only_managers(self):
+        self.client.force_login(
+            User.objects.create_user(username="u", email="u@test.com", password="pass")
+        )
+        self.assertEqual(self.post(action="amount", value="5").status_code, 403)
+        self.assertEqual(self.prices()["Чайник"], Decimal("50"))
+
+    def test_filters_prefilled_from_list(self):
+        response = self.client.get(f"{self.url}?q=чайник&shop={self.shop.pk}")
+        self.assertContains(response, 'value="чайник"')
+
+
+class ShopFacetTest(TestCase):
+    """Счётчики товаров магазинов и фасеты фильтра по магазину."""
+
+    def setUp(self):
+        cache.clear()
+        self.manager = User.objects.create_user(
+            username="manager", email="manager@test.com", password="pass",
+            role="sales_executive",
+        )
+        self.client.force_login(self.manager)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        for i in range(3):
+            Product.objects.create(name=f"Телефон {i}", price=100 + i, shop=self.shop)
+        Product.objects.create(name="Чайник", price=500, shop=self.other)
+
+    def counts(self):
+        return dict(Shop.objects.values_list("name", "product_count"))
+
+    def test_counts_follow_create_move_delete(self):
+        self.assertEqual(self.counts(), {"Магазин №1": 3, "Магазин №2": 1})
+        product = Product.objects.get(name="Чайник")
+        self.client.post(
+            reverse("product_edit", args=[product.pk]),
+            {"name": "Чайник", "description": "", "price": "500", "shop": self.shop.pk},
+        )
+        self.assertEqual(self.counts(), {"Магазин №1": 4, "Магазин №2": 0})
+        self.client.post(reverse("product_delete", args=[product.pk]))
+        self.assertEqual(self.counts(), {"Магазин №1": 3, "Магазин №2": 0})
+
+    def test_count_rolled_back_with_product(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Product.objects.create(name="Телефон", price=1, shop=self.other)
+            raise RuntimeError
+        self.assertEqual(self.counts(), {"Магазин №1": 3, "Магазин №2": 1})
+
+    def test_recount_after_bulk_create(self):
+        Product.objects.bulk_create(
+            [Product(name=f"Лампа {i}", price=10, shop=self.other) for i in range(5)]
+        )
+        facets.recount_product_counts()
+        self.assertEqual(self.counts(), {"Магазин №1": 3, "Магазин №2": 6})
+
+    def test_unfiltered_facets_are_one_cached_read(self):
+        # Как в запросе: версия каталога читается из базы один раз
+        with catalog_cache.version_scope():
+            with self.assertNumQueries(2):
+                facets.shop_facets(QueryDict())
+            with self.assertNumQueries(0):
+                shops = facets.shop_facets(QueryDict(f"shop={self.shop.pk}&sort=price"))
+        self.assertEqual([shop["count"] for shop in shops], [3, 1])
+
+    def test_search_facets_one_grouped_query(self):
+        with catalog_cache.version_scope():
+            facets.all_shops()
+            with self.assertNumQueries(1):
+                shops = facets.shop_facets(QueryDict(f"q=телефон&shop={self.other.pk}"))
+        self.assertEqual([shop["count"] for shop in shops], [3, 0])
+        shops = facets.shop_facets(QueryDict("min_price=102"))
+        self.assertEqual([shop["count"] for shop in shops], [1, 1])
+
+    def test_list_shows_counts_without_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"), {"q": "телефон"})
+        self.assertContains(response, "Магазин №1 (3)")
+        self.assertContains(response, "Магазин №2 (0)")
+        self.assertEqual(response.context["paginator"].count, 3)
+        self.assertFalse([q for q in queries.captured_queries if "COUNT(*)" in q["sql"]])
+
+
+class SessionAuthCacheTest(TestCase):
+    """Сессии и пользователь запроса без обращения к таблицам авторизации."""
+
+    AUTH_TABLES = ("django_session", "products_customuser")
+
+    def setUp(self):
+        auth_cache.user_cache.clear()
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        Product.objects.create(name="Телефон", price=100, shop=shop)
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        tables = [
+            query["sql"] for query in queries.captured_queries
+            if any(table in query["sql"] for table in self.AUTH_TABLES)
+        ]
+        return response, tables
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_catalog_read_skips_auth_tables(self):
+        self.client.login(email="user@test.com", password="userpass")
+        self.auth_queries(reverse("products"))
+        response, tables = self.auth_queries(reverse("products"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tables, [])
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookies(self):
+        self.client.login(email="user@test.com", password="userpass")
+        self.auth_queries(reverse("products"))
+        response, tables = self.auth_queries(reverse("products"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tables, [])
+
+    def test_role_change_invalidates(self):
+        self.client.login(email="user@test.com", password="userpass")
+        self.assertEqual(self.client.get(reverse("product_add")).status_code, 403)
+        self.user.role = "sales_executive"
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("product_add")).status_code, 200)
+
+    def test_password_change_logs_out(self):
+        self.client.login(email="user@test.com", password="userpass")
+        self.client.get(reverse("products"))
+        self.user.set_password("newpass")
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("products")).status_code, 302)
+
+    def test_password_change_in_other_process(self):
+        """Сессия с устаревшим хешем пароля не берёт пользователя из кэша."""
+        self.client.login(email="user@test.com", password="userpass")
+        self.client.get(reverse("products"))
+        session = self.client.session
+        session[HASH_SESSION_KEY] = "устаревший"
+        session.save()
+        self.assertEqual(self.client.get(reverse("products")).status_code, 302)
+
+    def test_session_mode_setting(self):
+        # Кэш сессий по умолчанию у каждого процесса свой — только база
+        self.assertEqual(settings.SESSION_ENGINE, "django.contrib.sessions.backends.db")
+        self.assertEqual(session_engine("cached_db"), "django.contrib.sessions.backends.cached_db")
+        with self.assertRaises(ImproperlyConfigured):
+            session_engine("redis")
+
+
+class SuggestTest(TestCase):
+    """Подсказки по началу слова из индекса в памяти процесса."""
+
+    def setUp(self):
+        suggest.reset()
+        self.addCleanup(suggest.reset)
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="pass"
+        )
+        self.client.force_login(self.user)
+        self.shop = Shop.objects.create(name="Электроника", address="ул. Ленина, 1")
+        self.phone = Product.objects.create(
+            name="Телефон Samsung Galaxy", price=100, shop=self.shop
+        )
+        self.case = Product.objects.create(name="Чехол для телефона", price=10, shop=self.shop)
+        self.hedgehog = Product.objects.create(name="Ёжик резиновый", price=5, shop=self.shop)
+        self.url = reverse("api_suggest")
+
+    def names(self, query, kind="products", **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.json()[kind]]
+
+    def test_prefix_of_any_word(self):
+        # Название, начинающееся с запроса, — первым
+        self.assertEqual(self.names("ТЕЛ"), [self.phone.name, self.case.name])
+        self.assertEqual(self.names("gal"), [self.phone.name])
+        self.assertEqual(self.names("ежик"), [self.hedgehog.name])
+        self.assertEqual(self.names("чехол тел"), [self.case.name])
+        self.assertEqual(self.names("тел", limit=1), [self.phone.name])
+        self.assertEqual(self.names("элек", "shops"), ["Электроника"])
+        self.assertEqual(self.names(""), [])
+
+    def test_no_queries_after_build(self):
+        self.names("тел")
+        with self.assertNumQueries(0):
+            suggest.get_index().suggest("тел")
+
+    def test_index_follows_signals_after_commit(self):
+        self.names("тел")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.name = "Смартфон Samsung"
+            self.phone.save()
+            Product.objects.create(name="Телевизор", price=500, shop=self.shop)
+            self.case.delete()
+        self.assertEqual(self.names("тел"), ["Телевизор"])
+        self.assertEqual(self.names("смарт"), ["Смартфон Samsung"])
+        # Без коммита изменения в индекс не попадают
+        Product.objects.create(name="Телескоп", price=900, shop=self.shop)
+        self.assertEqual(self.names("телес"), [])
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, {"q": "тел"}).status_code, 403)
+
+    def test_common_prefix_does_not_hide_matches(self):
+        index = suggest.PrefixIndex()
+        # Больше MATCH_LIMIT слов на «на», которые идут раньше «наушники»
+        items = [(suggest.PRODUCT, i, f"Набор {i}") for i in range(1, suggest.MATCH_LIMIT + 100)]
+        index.load([*items, (suggest.PRODUCT, 99999, "Беспроводные наушники")])
+        expected = [(99999, "Беспроводные наушники")]
+        self.assertEqual(index.suggest("беспроводные на")[suggest.PRODUCT], expected)
+        self.assertEqual(index.suggest("на беспр")[suggest.PRODUCT], expected)
+
+    def test_changes_during_build_are_kept(self):
+        build_index = suggest.build_index
+
+        def build_with_concurrent_commit(using="default"):
+            index = build_index(using)
+            # Коммит пришёл после чтения базы, но до готовности индекса
+            suggest.object_saved(suggest.PRODUCT, self.case.pk, "Чехол для смартфона")
+            suggest.object_deleted(suggest.PRODUCT, self.hedgehog.pk)
+            return index
+
+        suggest.build_index = build_with_concurrent_commit
+        self.addCleanup(setattr, suggest, "build_index", build_index)
+        self.assertEqual(self.names("смарт"), ["Чехол для смартфона"])
+        self.assertEqual(self.names("ежик"), [])
+
+
+class ProductGridFragmentTest(TestCase):
+    """Фрагмент «следующие карточки» для бесконечной прокрутки."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.client.force_login(user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        self.products = [
+            Product.objects.create(
+                name=f"Телефон {i}", price=100 + i % 4, shop=self.shop if i % 3 else other
+            )
+            for i in range(20)
+        ]
+
+    def scroll(self, params):
+        """id товаров первой страницы и всех подгруженных порций."""
+        response = self.client.get(reverse("products"), params)
+        ids = [product.pk for product in response.context["products"]]
+        match = re.search(r'id="load-more"[^>]*data-url="([^"]+)"', response.content.decode())
+        url = match.group(1).replace("&amp;", "&") if match else None
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [int(pk) for pk in re.findall(r'/products/(\d+)/" class="text-decoration-none"', response.content.decode())]
+            cursor = response.get("X-Next-Cursor")
+            url = f"{reverse('product_grid')}?{urlencode({**params, 'cursor': cursor})}" if cursor else None
+        return ids
+
+    def test_scroll_covers_catalog_once(self):
+        expected = sorted(
+            (p for p in self.products if p.shop_id == self.shop.pk),
+            key=lambda p: (-p.price, -p.pk),
+        )
+        self.assertEqual(
+            self.scroll({"shop": self.shop.pk, "sort": "-price"}), [p.pk for p in expected]
+        )
+        self.assertEqual(self.scroll({}), [p.pk for p in self.products])
+        with override_settings(PRODUCT_LIST_PAGINATION="cursor"):
+            self.assertEqual(self.scroll({}), [p.pk for p in self.products])
+
+    def test_fragment_has_no_layout_or_shop_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("product_grid"), {"q": "телефон"})
+        html = response.content.decode()
+        self.assertEqual(html.count('class="card h-100"'), 6)
+        for layout in ("<nav", "<form", "Наши магазины", "<html"):
+            self.assertNotIn(layout, html)
+        self.assertTrue(response["X-Next-Cursor"])
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("products_shop", sql)
+        self.assertNotIn("COUNT(", sql)
+
+    def test_cached_grid_keeps_next_cursor(self):
+        sentinel = re.compile(r'<div id="load-more"[^>]*>')
+        first = sentinel.findall(self.client.get(reverse("products")).content.decode())
+        self.assertEqual(len(first), 1)
+        # Попадание в кэш: сессия, валидаторы ETag и версия каталога — без магазинов
+        with self.assertNumQueries(3):
+            second = self.client.get(reverse("products")).content.decode()
+        self.assertEqual(sentinel.findall(second), first)
+
+    def test_anonymous_forbidden(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("product_grid")).status_code, 403)
+
+
+class AdminScaleTest(TestCase):
+    """Списки админки: запросы не растут с числом строк, счётчик ограничен."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@test.com", password="adminpass"
+        )
+        self.client.force_login(self.admin)
+        self.shops = [
+            Shop.objects.create(name=f"Магазин №{i}", address=f"ул. Ленина, {i}")
+            for i in range(1, 4)
+        ]
+
+    def add_products(self, count):
+        start = Product.objects.count()
+        for i in range(start, start + count):
+            Product.objects.create(
+                name=f"Телефон {i}", price=100 + i, shop=self.shops[i % len(self.shops)]
+            )
+
+    def changelist_queries(self, query=""):
+        url = reverse("admin:products_product_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{url}?{query}" if query else url)
+        self.assertEqual(response.status_code, 200)
+        return response, [item["sql"] for item in queries.captured_queries]
+
+    def test_changelist_queries_do_not_grow(self):
+        self.add_products(3)
+        # Первый запрос заполняет кэш пользователя
+        self.changelist_queries()
+        _, small = self.changelist_queries()
+        self.add_products(30)
+        _, large = self.changelist_queries()
+        # Магазин каждой строки приходит тем же запросом (list_select_related)
+        self.assertEqual(len(small), len(large))
+
+    def test_changelist_has_no_unbounded_count(self):
+        self.add_products(5)
+        _, queries = self.changelist_queries("shop__id__exact=%d" % self.shops[0].pk)
+        counts = [sql for sql in queries if "COUNT(" in sql.upper()]
+        self.assertTrue(counts)
+        # Счёт только по ограниченной выборке, без полного COUNT по таблице
+        self.assertTrue(all("LIMIT" in sql.upper() for sql in counts), counts)
+
+    def test_estimated_count(self):
+        self.add_products(5)
+        paginator = admin_module.EstimatedCountPaginator(Product.objects.order_by("id"), 2)
+        paginator.count_cap = 3
+        # Без фильтров — оценка по наибольшему id
+        self.assertEqual(paginator.count, Product.objects.order_by("-id").first().pk)
+        filtered = admin_module.EstimatedCountPaginator(
+            Product.objects.filter(price__gte=0).order_by("id"), 2
+        )
+        filtered.count_cap = 3
+        self.assertEqual(filtered.count, 3)
+        exact = admin_module.EstimatedCountPaginator(Product.objects.order_by("id"), 2)
+        self.assertEqual(exact.count, 5)
+
+    def test_search_uses_full_text_index(self):
+        self.add_products(3)
+        Product.objects.create(name="Чайник", price=10, shop=self.shops[0])
+        response, queries = self.changelist_queries("q=чайники")
+        self.assertEqual([p.name for p in response.context["cl"].result_list], ["Чайник"])
+        self.assertTrue(any(search.FTS_TABLE in sql for sql in queries))
+
+    def test_user_search_by_prefix(self):
+        User.objects.create_user(username="ivan", email="ivan@test.com", password="pass")
+        url = reverse("admin:products_customuser_changelist")
+        response = self.client.get(f"{url}?q=iva")
+        self.assertEqual(
+            [user.username for user in response.context["cl"].result_list], ["ivan"]
+        )
+
+    def test_shop_autocomplete_widget(self):
+        response = self.client.get(reverse("admin:products_product_add"))
+        self.assertContains(response, "admin-autocomplete")
+        # Варианты магазинов не выводятся в форму целиком
+        self.assertNotContains(response, self.shops[2].name)
+        autocomplete = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "№2",
+                "app_label": "products",
+                "model_name": "product",
+                "field_name": "shop",
+            },
+        )
+        self.assertEqual(
+            [item["text"] for item in autocomplete.json()["results"]], [str(self.shops[1])]
+        )
+
+
+class QueryPlanTest(TestCase):
+    """EXPLAIN QUERY PLAN для запросов представлений: без полного сканирования.
+
+    Выполняется настоящий запрос к странице, и для каждого SELECT из него
+    проверяется план. ``allowed`` — таблицы, которые страница читает
+    целиком или по порядку первичного ключа с LIMIT намеренно.
+    """
+
+    SCAN_RE = re.compile(r"^SCAN (\S+)$")
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="admin", email="admin@test.com", password="adminpass"
+        )
+        self.client.force_login(self.user)
+        self.shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        other = Shop.objects.create(name="Магазин №2", address="ул. Мира, 2")
+        for i in range(20):
+            Product.objects.create(
+                name=f"Телефон {i}", price=100 + i, shop=self.shop if i % 2 else other
+            )
+        self.product = Product.objects.first()
+
+    def full_scans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        scans = []
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for row in cursor.fetchall():
+                    match = self.SCAN_RE.match(row[-1])
+                    # «subquery» — уже ограниченная LIMIT выборка для COUNT
+                    if match and match.group(1) != "subquery":
+                        scans.append((match.group(1), sql))
+        return scans
+
+    def assertNoFullScan(self, url, allowed=()):
+        offending = [(table, sql) for table, sql in self.full_scans(url) if table not in allowed]
+        self.assertFalse(
+            offending,
+            f"Полное сканирование для {url}:\n"
+            + "\n".join(f"{table}: {sql}" for table, sql in offending),
+        )
+
+    def test_product_list(self):
+        url = reverse("products")
+        # Все магазины — для фильтра; товары без фильтра идут по id с LIMIT
+        self.assertNoFullScan(url, allowed=("products_shop", "products_product"))
+        self.assertNoFullScan(f"{url}?shop={self.shop.pk}", allowed=("products_shop",))
+        self.assertNoFullScan(f"{url}?shop={self.shop.pk}&page=2", allowed=("products_shop",))
+        self.assertNoFullScan(f"{url}?q=телефон&shop={self.shop.pk}", allowed=("products_shop",))
+        self.assertNoFullScan(f"{url}?sort=price&page=2", allowed=("products_shop",))
+        self.assertNoFullScan(f"{url}?sort=-price&min_price=105", allowed=("products_shop",))
+        self.assertNoFullScan(
+            f"{url}?shop={self.shop.pk}&min_price=101&max_price=115&sort=-price",
+            allowed=("products_shop",),
+        )
+        with override_settings(PRODUCT_LIST_PAGINATION="cursor"):
+            self.assertNoFullScan(f"{url}?shop={self.shop.pk}", allowed=("products_shop",))
+            self.assertNoFullScan(f"{url}?sort=price", allowed=("products_shop",))
+
+    def test_detail_and_export(self):
+        self.assertNoFullScan(reverse("product_detail", args=[self.product.pk]))
+        self.assertNoFullScan(f"{reverse('product_export')}?shop={self.shop.pk}")
+
+    def test_api(self):
+        self.assertNoFullScan(f"{reverse('api_products')}?shop={self.shop.pk}")
+        self.assertNoFullScan(reverse("api_product_detail", args=[self.product.pk]))
+
+    def test_admin_filter_by_shop(self):
+        url = reverse("admin:products_product_changelist")
+        # Магазины — для боковой панели фильтра
+        self.assertNoFullScan(f"{url}?shop__id__exact={self.shop.pk}", allowed=("products_shop",))
+
+    def test_admin_search(self):
+        url = reverse("admin:products_product_changelist")
+        self.assertNoFullScan(f"{url}?q=телефон", allowed=("products_shop",))
+        # Пользователи ищутся по началу email или имени через их индексы
+        self.assertNoFullScan(f"{reverse('admin:products_customuser_changelist')}?q=adm")
+
+    def test_shop_price_order_uses_index(self):
+        queryset = Product.objects.filter(shop=self.shop).order_by("price", "id")
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(any("product_shop_price_idx" in step for step in plan), plan)
+        self.assertFalse(any("TEMP B-TREE" in step for step in plan), plan)
+
+
+class BenchmarkSuiteTest(TestCase):
+    """Генератор синтетического каталога и сценарии нагрузки."""
+
+    def test_generate_catalog(self):
+        generate_catalog(products=120, shops=3, batch_size=50, seed=1)
+        self.assertEqual(Shop.objects.count(), 3)
+        self.assertEqual(Product.objects.count(), 120)
+        product = Product.objects.first()
+        self.assertRegex(product.name, "[а-яё]")
+        self.assertGreater(product.price, 0)
+        # Товары сразу попадают в поисковый индекс
+        noun = product.name.split()[1]
+        self.assertTrue(search.search_products(Product.objects.all(), noun).exists())
+
+    def test_generate_catalog_resumes(self):
+        generate_catalog(products=30, shops=3, batch_size=20, seed=1)
+        generate_catalog(products=25, shops=3, batch_size=20, seed=1)
+        self.assertEqual(Shop.objects.count(), 3)
+        self.assertEqual(Product.objects.count(), 55)
+        self.assertTrue(Product.objects.filter(sku="BENCH-00000055").exists())
+        generate_catalog(products=5, shops=4, seed=1)
+        self.assertEqual(Shop.objects.filter(name__endswith="№4").count(), 1)
+        self.assertEqual(Shop.objects.count(), 4)
+
+    def test_scenarios_smoke(self):
+        generate_catalog(products=30, shops=2, seed=1)
+        manager = User.objects.create_user(
+            username="bench", email="bench@test.com", password="pass", role="sales_executive"
+        )
+        self.client.force_login(manager)
+        catalog = Catalog()
+        rng = random.Random(0)
+        for name in SCENARIOS:
+            result = run_scenario(self.client, name, catalog, 2, rng)
+            self.assertEqual(result["errors"], 0, name)
+            if name != "suggest":  # подсказки отвечают из памяти, без SQL
+                self.assertGreater(result["queries_mean"], 0, name)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    """Заголовок Server-Timing, журнал медленных запросов и сводка по URL."""
+
+    TIMING_RE = re.compile(r'db;dur=[\d.]+;desc="SQL: (\d+)", tpl;dur=([\d.]+), view;dur=')
+
+    def setUp(self):
+        cache.clear()
+        performance.stats.reset()
+        self.user = User.objects.create_user(
+            username="user", email="user@test.com", password="userpass", role="user"
+        )
+        self.staff = User.objects.create_user(
+            username="staff", email="staff@test.com", password="staffpass", is_staff=True
+        )
+        shop = Shop.objects.create(name="Магазин №1", address="ул. Ленина, 1")
+        self.product = Product.objects.create(name="Телефон", price=100, shop=shop)
+
+    def test_server_timing(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("products"))
+        match = self.TIMING_RE.match(response.headers["Server-Timing"])
+        self.assertIsNotNone(match, response.headers["Server-Timing"])
+        self.assertEqual(int(match.group(1)), len(queries))
+        self.assertGreater(float(match.group(2)), 0)
+
+    async def test_server_timing_async_view(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("async_api_products"))
+        match = self.TIMING_RE.match(response.headers["Server-Timing"])
+        # SQL асинхронного ORM тоже учтён
+        self.assertGreater(int(match.group(1)), 0)
+
+    async def test_async_chain(self):
+        async def get_response(request):
+            await Product.objects.acount()
+            return HttpResponse()
+
+        middleware = performance.PerformanceMiddleware(get_response)
+        # Под ASGI цепочка остаётся асинхронной
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get("/"))
+        match = self.TIMING_RE.match(response.headers["Server-Timing"])
+        self.assertEqual(int(match.group(1)), 1)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged_with_queries(self):
+        self.client.force_login(self.user)
+        with self.assertLogs("products.performance", "WARNING") as logs:
+            self.client.get(reverse("product_detail", args=[self.product.pk]))
+        self.assertIn("product_detail", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_stats_page(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("product_detail", args=[self.product.pk]))
+        self.client.get(reverse("product_detail", args=[self.product.pk]))
+        self.assertEqual(self.client.get(reverse("performance_stats")).status_code, 403)
+
+        rows = {row["name"]: row for row in performance.stats.snapshot()}
+        self.assertEqual(rows["product_detail"]["count"], 2)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("performance_stats"))
+        self.assertContains(response, "product_detail")
+        self.client.post(reverse("performance_stats"))
+        names = [row["name"] for row in performance.stats.snapshot()]
+        self.assertNotIn("product_detail", names)
+
+
+class QueryBudgetTest(TestCase):
+    """Бюджет SQL-запросов для каждого именованного URL приложения.
+
+    Каждый URL из ``products/urls.py`` открывается от имени каждой роли
+    на маленьком и на большом каталоге. Число запросов не должно
+    превышать бюджет и не должно зависеть от размера каталога или
+    страницы — иначе в шаблоне или представлении появился N+1.
+    """
+
+    ROLES = ("anonymous", "user", "sales_executive", "superuser")
+
+    #: Максимум SQL-запросов на GET (по всем ролям и вариантам параметров).
+    #: Два из них у вошедшего пользователя — сессия и сам пользователь.
+    QUERY_BUDGETS = {
+        "register": 2,
+        "login": 2,
+        "logout": 0,
+        "products": 6,
+        "product_grid": 3,
+        "product_detail": 4,
+        "product_export": 3,
+        "product_add": 3,
+        "product_edit": 4,
+        "product_delete": 3,
+        "product_bulk": 4,
+        "api_products": 3,
+        "api_product_detail": 3,
+        "api_shops": 3,
+        "api_suggest": 2,
+        "async_api_products": 3,
+        "async_api_product_detail": 3,
+        "async_api_search": 4,
+        "catalog_cache_stats": 2,
+        "performance_stats": 2,
+    }
+
+    #: Варианты параметров запроса для URL (по умолчанию — без параметров).
+    QUERY_VARIANTS = {
+        "products": [
+            "",
+            "page=2",
+            "q=телефон",
+            "shop={shop}",
+            "q=телефон&shop={shop}",
+            "min_price=101&max_price=105&sort=-price",
+            "sort=newest&shop={shop}",
+        ],
+        "product_grid": ["", "q=телефон", "shop={shop}&sort=price"],
+        "product_export": ["format=csv", "format=jsonl&shop={shop}"],
+        "api_products": ["limit=2", "limit=100", "q=телефон", "shop={shop}", "sort=price"],
+        "api_shops": ["limit=2", "limit=100"],
+        "api_suggest": ["q=тел", "q=магазин&limit=2"],
+        "async_api_products": ["limit=2", "limit=100"],
+        "async_api_search": ["q=телефон&limit=2", "q=телефон&limit=100"],
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            "user": User.objects.create_user(
+                username="user", email="user@test.com", password="pass", role="user"
+            ),
+            "sales_executive": User.objects.create_user(
+                username="manager", email="manager@test.com", password="pass",
+                role="sales_executive",
+            ),
+            "superuser": User.objects.create_superuser(
+                username="admin", email="admin@test.com", password="pass"
+            ),
+        }
+        self.shops = [
+            Shop.objects.create(name=f"Магазин №{i}", address=f"ул. Ленина, {i}")
+            for i in range(1, 4)
+        ]
+        # Две страницы списка: есть что показать на ?page=2
+        self.add_products(8)
+        # Индекс подсказок строится один раз на процесс, а не на запрос
+        suggest.reset()
+        suggest.get_index()
+
+    def add_products(self, count):
+        start = Product.objects.count()
+        for i in range(start, start + count):
+            Product.objects.create(
+                name=f"Телефон {i}",
+                description=f"Описание {i}",
+                price=100 + i,
+                shop=self.shops[i % len(self.shops)],
+            )
+
+    def named_urls(self):
+        product = Product.objects.order_by("id").first()
+        for pattern in product_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            kwargs = {name: product.pk for name in pattern.pattern.converters}
+            url = reverse(pattern.name, kwargs=kwargs)
+            for query in self.QUERY_VARIANTS.get(pattern.name, [""]):
+                query = query.format(shop=self.shops[0].pk)
+                yield pattern.name, f"{url}?{query}" if query else url
+
+    def measure(self):
+        """``{(имя URL, url, роль): список SQL}`` для всех URL и ролей."""
+        results = {}
+        for role in self.ROLES:
+            self.client.logout()
+            if role != "anonymous":
+                self.client.force_login(self.users[role])
+            for name, url in self.named_urls():
+                # Кэш сетки сбрасывается: измеряется путь с отрисовкой
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 500, url)
+                results[name, url, role] = [query["sql"] for query in queries.captured_queries]
+        return results
+
+    def test_every_url_has_budget(self):
+        names = {name for name, _ in self.named_urls()}
+        self.assertEqual(names - set(self.QUERY_BUDGETS), set())
+
+    def test_query_budgets(self):
+        small = self.measure()
+        self.add_products(40)
+        large = self.measure()
+        failures = []
+        for key, queries in large.items():
+            name, url, role = key
+            budget = self.QUERY_BUDGETS[name]
+            if len(queries) > budget:
+                failures.append(f"{url} ({role}): {len(queries)} > бюджета {budget}")
+            elif len(queries) != len(small[key]):
+                failures.append(
+                    f"{url} ({role}): {len(small[key])} → {len(queries)} запросов "
+                    "при росте каталога"
+                )
+            else:
+                continue
+            failures.extend(f"    {sql}" for sql in queries)
+        if failures:
+            self.fail("Превышен бюджет SQL-запросов:\n" + "\n".join(failures))
+
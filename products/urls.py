@@ -1,7 +1,7 @@
 from django.urls import path
 from django.contrib.auth.views import LoginView, LogoutView
 
-from . import views
+from . import api, async_views, views
 from .views import (
     RegisterView,
     ProductListView,
@@ -10,6 +10,11 @@ from .views import (
     ProductUpdateView,
     ProductDeleteView,
     CustomLoginView,
+    CatalogCacheStatsView,
+    PerformanceStatsView,
+    ProductExportView,
+    ProductGridFragmentView,
+    ProductBulkUpdateView,
 )
 
 #: URL-шаблоны приложения.
@@ -20,8 +25,40 @@ urlpatterns = [
     path("logout/", LogoutView.as_view(next_page="login"), name="logout"),
 
     path("", ProductListView.as_view(), name="products"),
+    path("grid/", ProductGridFragmentView.as_view(), name="product_grid"),
     path("<int:pk>/", ProductDetailView.as_view(), name="product_detail"),
+    path("export/", ProductExportView.as_view(), name="product_export"),
     path("add/", ProductCreateView.as_view(), name="product_add"),
     path("<int:pk>/edit/", ProductUpdateView.as_view(), name="product_edit"),
     path("<int:pk>/delete/", ProductDeleteView.as_view(), name="product_delete"),
+    path("bulk/", ProductBulkUpdateView.as_view(), name="product_bulk"),
+
+    path("api/products/", api.ProductListApiView.as_view(), name="api_products"),
+    path(
+        "api/products/<int:pk>/",
+        api.ProductDetailApiView.as_view(),
+        name="api_product_detail",
+    ),
+    path("api/shops/", api.ShopListApiView.as_view(), name="api_shops"),
+    path("api/suggest/", api.SuggestApiView.as_view(), name="api_suggest"),
+
+    # Асинхронные варианты (ASGI: shoplist/asgi.py)
+    path(
+        "api/async/products/",
+        async_views.AsyncProductListView.as_view(),
+        name="async_api_products",
+    ),
+    path(
+        "api/async/products/<int:pk>/",
+        async_views.AsyncProductDetailView.as_view(),
+        name="async_api_product_detail",
+    ),
+    path(
+        "api/async/search/",
+        async_views.AsyncProductSearchView.as_view(),
+        name="async_api_search",
+    ),
+
+    path("cache-stats/", CatalogCacheStatsView.as_view(), name="catalog_cache_stats"),
+    path("performance/", PerformanceStatsView.as_view(), name="performance_stats"),
 ]
@@ -1,7 +1,16 @@
+import csv
+import hashlib
+import json
+
+from django.conf import settings
 from django.contrib.auth import login
 from django.contrib import messages
-from django.db.models import Q
-from django.urls import reverse_lazy
+from django.db.models import F, Subquery
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
 from django.shortcuts import redirect, render
 from django.views.generic import (
     CreateView,
@@ -9,12 +18,20 @@ from django.views.generic import (
     UpdateView,
     DeleteView,
     DetailView,
+    FormView,
+    TemplateView,
+    View,
 )
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView
-from django.core.paginator import Paginator
-
-from .forms import ProductForm, CustomUserCreationForm
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+
+from . import cache as catalog_cache
+from . import facets, performance
+from .filters import SORT_CHOICES, filter_products
+from .pagination import CursorPage, CursorPaginator
+from .forms import BulkProductForm, ProductForm, CustomUserCreationForm
 from .models import CustomUser, Product, Shop
 
 
@@ -43,7 +60,53 @@ class CustomLoginView(LoginView):
         return reverse_lazy("products")
 
 
-class ProductListView(LoginRequiredMixin, ListView):
+class ConditionalGetMixin:
+    """Миксин: ответ 304 Not Modified по ETag и Last-Modified.
+
+    Валидаторы считаются дешёвым запросом до отрисовки страницы.
+    ETag зависит от пользователя и его роли: от них зависят кнопки
+    управления товаром и приветствие в шапке. У вошедшего пользователя
+    в ETag входит и ключ сессии: при каждом входе меняются и он, и
+    секрет CSRF, а закэшированная страница со старым токеном в форме
+    выхода дала бы 403. Last-Modified такой
+    зависимости не выражает (и не сдвигается при удалении товара),
+    поэтому страницы каталога его не отдают и полагаются на ETag.
+    """
+
+    def get_validators(self):
+        """Возвращает ``(части ETag, Last-Modified)``.
+
+        По умолчанию ``(None, None)`` — условный GET выключен.
+        """
+        return None, None
+
+    def _validators(self):
+        if not hasattr(self, "_cached_validators"):
+            parts, last_modified = self.get_validators()
+            etag = None
+            if parts is not None:
+                user = self.request.user
+                parts = (*parts, user.pk, getattr(user, "role", None), user.is_superuser)
+                if user.is_authenticated:
+                    parts = (*parts, self.request.session.session_key)
+                etag = '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+            self._cached_validators = (etag, last_modified)
+        return self._cached_validators
+
+    def get(self, request, *args, **kwargs):
+        view = condition(
+            etag_func=lambda *a, **kw: self._validators()[0],
+            last_modified_func=lambda *a, **kw: self._validators()[1],
+        )(super().get)
+        return view(request, *args, **kwargs)
+
+
+def latest_updated_at(model):
+    """Подзапрос: последнее значение ``updated_at`` модели (по индексу)."""
+    return Subquery(model.objects.order_by("-updated_at").values("updated_at")[:1])
+
+
+class ProductListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     """Список товаров с фильтрацией и пагинацией (для авторизованных пользователей)."""
 
     model = Product
@@ -53,35 +116,206 @@ class ProductListView(LoginRequiredMixin, ListView):
     login_url = "/login/"
     redirect_field_name = "next"
 
+    def get_validators(self):
+        """Версия каталога и последние изменения товаров и магазинов.
+
+        Один запрос: последняя дата изменения магазина и подзапрос по
+        товарам. Версия каталога учитывает и удаления. Last-Modified
+        не отдаётся: удаление товара его не сдвигает.
+        """
+        row = (
+            Shop.objects.order_by("-updated_at")
+            .annotate(product_updated_at=latest_updated_at(Product))
+            .values_list("updated_at", "product_updated_at")
+            .first()
+        )
+        shop_updated_at, product_updated_at = row or (None, None)
+        last_modified = max(filter(None, (shop_updated_at, product_updated_at)), default=None)
+        params = sorted((key, tuple(self.request.GET.getlist(key))) for key in self.request.GET)
+        parts = ("list", catalog_cache.catalog_version(), last_modified, params)
+        return parts, None
+
+    def get_paginate_by(self, queryset):
+        """При попадании в кэш товары не выбираются и не пагинируются."""
+        if self.cached_grid is not None:
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get_pagination_mode(self):
+        """Режим пагинации: ``page`` (номера страниц) или ``cursor``."""
+        return getattr(settings, "PRODUCT_LIST_PAGINATION", "page")
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        """Общее число товаров берётся из фасетов магазинов, без COUNT(*)."""
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        paginator.count = facets.total_count(self.shop_facets, self.request.GET)
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        """В курсорном режиме выбирает страницу по ключу, без COUNT и OFFSET."""
+        if self.get_pagination_mode() != "cursor":
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_queryset(self):
-        """Фильтрует товары по запросу и выбранному магазину."""
-        queryset = super().get_queryset().order_by("id")
-        query = self.request.GET.get("q")
-        shop_id = self.request.GET.get("shop")
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) | Q(description__icontains=query)
-            )
-        if shop_id:
-            queryset = queryset.filter(shop_id=shop_id)
-        return queryset
+        """Фильтрует товары по запросу и выбранному магазину.
+
+        При поиске товары упорядочены по релевантности (индекс FTS5).
+        Если отрисованная сетка есть в кэше, товары не выбираются.
+        Фасеты магазинов нужны и при попадании в кэш — для фильтра.
+        """
+        self.shop_facets = facets.shop_facets(self.request.GET)
+        self.cached_grid = catalog_cache.get_grid(self.request.GET)
+        if self.cached_grid is not None:
+            return Product.objects.none()
+        return filter_products(super().get_queryset(), self.request.GET)
 
     def get_context_data(self, **kwargs):
-        """Добавляет список магазинов и параметры фильтрации в контекст."""
+        """Добавляет магазины с числом найденных товаров и параметры фильтрации."""
         context = super().get_context_data(**kwargs)
-        context["shops"] = Shop.objects.all()
+        context["shops"] = self.shop_facets
         context["q"] = self.request.GET.get("q", "")
         context["selected_shop"] = self.request.GET.get("shop", "")
+        context["min_price"] = self.request.GET.get("min_price", "")
+        context["max_price"] = self.request.GET.get("max_price", "")
+        context["sort"] = self.request.GET.get("sort", "")
+        context["sort_choices"] = SORT_CHOICES
+        context["pagination_mode"] = self.get_pagination_mode()
+        if self.cached_grid is None:
+            context["next_cursor"] = self.get_next_cursor(context)
+            with performance.timed_render():
+                context["product_grid"] = render_to_string(
+                    "products/_product_grid.html", context, self.request
+                )
+            catalog_cache.set_grid(
+                self.request.GET, context["product_grid"], using=self.object_list.db
+            )
+        else:
+            context["product_grid"] = self.cached_grid
         return context
 
+    def get_next_cursor(self, context):
+        """Курсор для подгрузки карточек после текущей страницы."""
+        page = context["page_obj"]
+        if page is None or not page.has_next():
+            return None
+        if isinstance(page, CursorPage):
+            return page.next_cursor
+        # Страница с номером: курсор по последнему товару. Список берётся
+        # из того же queryset, что и в шаблоне, — без второго запроса.
+        last = list(context["object_list"])[-1]
+        return CursorPaginator(self.object_list, self.paginate_by).cursor_after(last)
+
+
+class ProductGridFragmentView(LoginRequiredMixin, View):
+    """Следующая порция карточек товаров — фрагмент HTML без разметки страницы.
+
+    Принимает те же фильтры, что и список, и курсор ``cursor``; курсор
+    следующей порции возвращается в заголовке ``X-Next-Cursor``. Ни
+    магазины, ни общее число товаров не выбираются.
+    """
+
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        queryset = filter_products(Product.objects.all(), request.GET)
+        paginator = CursorPaginator(queryset, ProductListView.paginate_by)
+        try:
+            page = paginator.page(request.GET.get("cursor"))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        with performance.timed_render():
+            response = render(request, "products/_product_cards.html", {"products": page})
+        if page.has_next():
+            response["X-Next-Cursor"] = page.next_cursor
+        return response
+
+
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
 
-class ProductDetailView(LoginRequiredMixin, DetailView):
+class ProductExportView(LoginRequiredMixin, View):
+    """Потоковая выгрузка отфильтрованного каталога в CSV или JSON Lines.
+
+    Принимает те же фильтры ``q`` и ``shop``, что и список товаров.
+    Строки читаются через ``.values().iterator()``, поэтому память
+    не растёт с размером каталога.
+    """
+
+    login_url = "/login/"
+    chunk_size = 2000
+    fields = ("id", "sku", "name", "description", "price", "shop_id")
+    content_types = {
+        "csv": "text/csv; charset=utf-8",
+        "jsonl": "application/x-ndjson; charset=utf-8",
+    }
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in self.content_types:
+            return HttpResponseBadRequest("Формат должен быть csv или jsonl.")
+        rows = (
+            filter_products(Product.objects.all(), request.GET)
+            .order_by("id")
+            .values(*self.fields, shop_name=F("shop__name"))
+            .iterator(chunk_size=self.chunk_size)
+        )
+        stream = self.stream_csv(rows) if fmt == "csv" else self.stream_jsonl(rows)
+        response = StreamingHttpResponse(stream, content_type=self.content_types[fmt])
+        response["Content-Disposition"] = f'attachment; filename="products.{fmt}"'
+        return response
+
+    def _batched(self, lines):
+        """Склеивает строки в блоки, чтобы не отдавать ответ по одной строке."""
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= self.chunk_size:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+    def stream_csv(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow([*self.fields, "shop_name"])
+        yield from self._batched(writer.writerow(row.values()) for row in rows)
+
+    def stream_jsonl(self, rows):
+        yield from self._batched(
+            json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows
+        )
+
+
+class ProductDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     """Детальная информация о товаре (для авторизованных пользователей)."""
 
     model = Product
+    # Магазин выводится на странице — загружается тем же запросом
+    queryset = Product.objects.select_related("shop")
     template_name = "products/product_detail.html"
     context_object_name = "product"
 
+    def get_validators(self):
+        """Даты изменения товара и его магазина (один запрос по pk) — в ETag."""
+        row = (
+            Product.objects.filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", "shop__updated_at")
+            .first()
+        )
+        if row is None:
+            return None, None
+        return ("detail", self.kwargs["pk"], *row), None
+
 
 class ManagerRequiredMixin(UserPassesTestMixin):
     """Миксин: доступ только для менеджеров (sales_executive)."""
@@ -93,6 +327,37 @@ class ManagerRequiredMixin(UserPassesTestMixin):
         )
 
 
+class StaffRequiredMixin(UserPassesTestMixin):
+    """Миксин: доступ только для персонала (is_staff)."""
+
+    def test_func(self):
+        return self.request.user.is_authenticated and self.request.user.is_staff
+
+
+class CatalogCacheStatsView(LoginRequiredMixin, StaffRequiredMixin, View):
+    """Счётчики кэша сетки товаров в JSON (только для персонала)."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(catalog_cache.grid_cache_stats())
+
+
+class PerformanceStatsView(LoginRequiredMixin, StaffRequiredMixin, TemplateView):
+    """Сводка времени ответа по именам URL за время работы процесса."""
+
+    template_name = "products/performance_stats.html"
+
+    def post(self, request, *args, **kwargs):
+        """Сбрасывает накопленную сводку."""
+        performance.stats.reset()
+        return redirect("performance_stats")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["rows"] = performance.stats.snapshot()
+        context["slow_request_ms"] = getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 500)
+        return context
+
+
 class ProductCreateView(LoginRequiredMixin, ManagerRequiredMixin, CreateView):
     """Создание товара (только для менеджеров)."""
 
@@ -127,6 +392,34 @@ class ProductUpdateView(LoginRequiredMixin, ManagerRequiredMixin, UpdateView):
         return reverse_lazy("product_detail", kwargs={"pk": self.object.pk})
 
 
+class ProductBulkUpdateView(LoginRequiredMixin, ManagerRequiredMixin, FormView):
+    """Массовое изменение цены или магазина товаров (только для менеджеров).
+
+    Фильтры формы берутся из GET-параметров списка товаров. Кнопка
+    «Проверить» показывает число товаров, которые будут изменены, ничего
+    не меняя; «Применить» выполняет изменение одним UPDATE.
+    """
+
+    form_class = BulkProductForm
+    template_name = "products/product_bulk_form.html"
+
+    def get_initial(self):
+        return {key: self.request.GET.get(key) for key in self.request.GET}
+
+    def form_valid(self, form):
+        apply = "apply" in self.request.POST
+        try:
+            count = form.run(dry_run=not apply)
+        except ValidationError as e:
+            form.add_error("value", e)
+            return self.form_invalid(form)
+        if not apply:
+            return self.render_to_response(self.get_context_data(form=form, preview_count=count))
+        messages.success(self.request, f"Изменено товаров: {count}.")
+        query = urlencode(form.filter_params())
+        return redirect(f"{reverse('products')}?{query}" if query else reverse("products"))
+
+
 # Удаление товара (для менеджера)
 
 
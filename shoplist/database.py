@@ -0,0 +1,77 @@
+"""Профили подключения к SQLite.
+
+``development`` — настройки Django по умолчанию: журнал отката и новое
+соединение на каждый запрос. ``production`` — WAL, ослабленный
+``synchronous``, mmap и кэш страниц, ожидание блокировки вместо ошибки
+«database is locked» и постоянные соединения с проверкой перед запросом.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+#: PRAGMA, выполняемые при открытии каждого соединения в профиле production.
+PRODUCTION_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот
+    "journal_mode": "WAL",
+    # В режиме WAL fsync только при checkpoint — без потери целостности
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ (64 МиБ)
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+PROFILES = {
+    "development": {},
+    "production": {
+        "OPTIONS": {
+            "init_command": ";".join(
+                f"PRAGMA {name} = {value}" for name, value in PRODUCTION_PRAGMAS.items()
+            ),
+            # Транзакция сразу берёт блокировку записи: иначе чтение внутри
+            # транзакции, переходящее в запись, получает SQLITE_BUSY без ожидания
+            "transaction_mode": "IMMEDIATE",
+            "timeout": PRODUCTION_PRAGMAS["busy_timeout"] / 1000,
+        },
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
+    },
+}
+
+
+def sqlite_database(name, profile="development"):
+    """Запись ``DATABASES`` для файла SQLite ``name`` в заданном профиле."""
+    try:
+        extra = PROFILES[profile]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Неизвестный профиль базы данных {profile!r}: "
+            f"допустимы {', '.join(sorted(PROFILES))}."
+        )
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        **extra,
+        "OPTIONS": dict(extra.get("OPTIONS", {})),
+    }
+
+
+def replica_databases(spec, profile="development"):
+    """Записи ``DATABASES`` и веса реплик из строки ``путь[=вес],...``.
+
+    Реплики получают псевдонимы ``replica_1``, ``replica_2``, … В тестах
+    они зеркалируют основную базу (``TEST["MIRROR"]``).
+    """
+    databases, weights = {}, {}
+    for number, item in enumerate(filter(None, (part.strip() for part in spec.split(","))), 1):
+        path, _, weight = item.partition("=")
+        alias = f"replica_{number}"
+        try:
+            weights[alias] = int(weight or 1)
+        except ValueError:
+            raise ImproperlyConfigured(f"Некорректный вес реплики: {item!r}.")
+        databases[alias] = {
+            **sqlite_database(path.strip(), profile),
+            "TEST": {"MIRROR": "default"},
+        }
+    return databases, weights
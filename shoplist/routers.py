@@ -0,0 +1,141 @@
+"""Маршрутизация запросов к основной базе и репликам для чтения.
+
+Чтение каталога (товары, магазины, поисковый индекс) внутри
+HTTP-запроса уходит на реплики по взвешенному round-robin. Запись,
+аутентификация, сессии и всё, что выполняется вне запроса (команды
+управления, shell), идут в основную базу ``default``.
+
+Read-your-writes: запрос, изменивший каталог, дальше читает из основной
+базы, а cookie ``REPLICA_PIN_COOKIE`` закрепляет за ней и следующие
+запросы клиента на ``REPLICA_PIN_SECONDS`` — время на догоняние реплик.
+"""
+
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = "default"
+
+#: Модели, чтение которых можно отдавать репликам.
+CATALOG_MODELS = frozenset(
+    {"products.product", "products.shop", "products.productsearchentry"}
+)
+
+REPLICA_PIN_COOKIE = "pin_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RequestState:
+    """Состояние маршрутизации текущего запроса.
+
+    Объект изменяемый: запись, сделанная в потоке ``sync_to_async``,
+    видна middleware, хотя контекст там копируется.
+    """
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# None — вне HTTP-запроса: всё читается из основной базы
+_state = ContextVar("replica_routing_state", default=None)
+
+
+class PrimaryReplicaRouter:
+    """Роутер: чтение каталога — из реплик, всё остальное — из основной базы.
+
+    Реплики берутся из ``settings.REPLICA_DATABASES`` (псевдоним → вес).
+    Выбор — плавный взвешенный round-robin: при равных весах реплики
+    чередуются строго по кругу.
+    """
+
+    def __init__(self, replicas=None):
+        if replicas is None:
+            replicas = getattr(settings, "REPLICA_DATABASES", {})
+        self.weights = {alias: int(weight) for alias, weight in replicas.items() if weight > 0}
+        self.current = dict.fromkeys(self.weights, 0)
+        self.total = sum(self.weights.values())
+        self.lock = threading.Lock()
+
+    def next_replica(self):
+        with self.lock:
+            for alias, weight in self.weights.items():
+                self.current[alias] += weight
+            alias = max(self.current, key=self.current.get)
+            self.current[alias] -= self.total
+        return alias
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if not self.weights or state is None or state.pinned:
+            return PRIMARY
+        if model._meta.label_lower not in CATALOG_MODELS:
+            return PRIMARY
+        return self.next_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.label_lower in CATALOG_MODELS:
+            # Дальнейшие чтения этого запроса должны видеть запись
+            state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик приходит вместе с данными из основной базы
+        return db == PRIMARY
+
+
+class ReplicaPinningMiddleware:
+    """Разрешает чтение из реплик на время безопасного HTTP-запроса.
+
+    Небезопасные методы (POST и т.д.) и запросы с cookie закрепления
+    целиком работают с основной базой. Если запрос что-то записал в
+    каталог, ответ ставит cookie закрепления.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RequestState(self.pin_request(request))
+        token = _state.set(state)
+        try:
+            return self.finish(state, self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        state = RequestState(self.pin_request(request))
+        token = _state.set(state)
+        try:
+            return self.finish(state, await self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    def pin_request(self, request):
+        return request.method not in SAFE_METHODS or REPLICA_PIN_COOKIE in request.COOKIES
+
+    def finish(self, state, response):
+        if state.wrote:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,30 @@
+"""Режимы хранения сессий.
+
+``db`` (по умолчанию) — таблица ``django_session``: чтение сессии на
+каждый запрос.
+``cached_db`` — та же таблица, но сессия читается из кэша
+(``CACHES["sessions"]``), а база нужна только при промахе и записи.
+Кэш должен быть общим для всех процессов: с ``LocMemCache`` выход или
+``session.flush()`` очищает кэш только своего процесса, и остальные
+принимают сессию до истечения ``SESSION_COOKIE_AGE``.
+``signed_cookies`` — сессия целиком в подписанной cookie, без базы и
+кэша; размер cookie ограничен, а завершить сессию на сервере нельзя.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+
+
+def session_engine(mode):
+    """``SESSION_ENGINE`` для режима ``mode``."""
+    try:
+        return SESSION_ENGINES[mode]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Неизвестный режим сессий {mode!r}: допустимы {', '.join(sorted(SESSION_ENGINES))}."
+        )
@@ -1,5 +1,9 @@
+import os
 from pathlib import Path
 
+from shoplist.database import replica_databases, sqlite_database
+from shoplist.sessions import session_engine
+
 
 # -------------------------------------------------------------------
 # Базовые настройки
@@ -31,11 +35,18 @@ INSTALLED_APPS = [
 # Промежуточное ПО (Middleware)
 # -------------------------------------------------------------------
 MIDDLEWARE = [
+    # Собранная статика отдаётся до всего остального: без сессий и базы
+    "shoplist.staticfiles.StaticFilesMiddleware",
+    # Замеряет всё, что делают остальные middleware
+    "products.performance.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "products.auth_cache.CachedAuthenticationMiddleware",
+    "shoplist.routers.ReplicaPinningMiddleware",
+    # Версия каталога (общая для процессов, в базе) — одно чтение на запрос
+    "products.cache.CatalogVersionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -72,17 +83,66 @@ TEMPLATES = [
 # -------------------------------------------------------------------
 # База данных
 # -------------------------------------------------------------------
+# Профиль подключения: "development" или "production" (WAL, PRAGMA,
+# постоянные соединения) — см. shoplist/database.py
+DATABASE_PROFILE = os.environ.get("SHOPLIST_DB_PROFILE", "development")
+
+# Файл основной базы (SHOPLIST_DB_NAME — например, отдельная база для бенчмарков)
 DATABASES = {
+    "default": sqlite_database(
+        os.environ.get("SHOPLIST_DB_NAME", BASE_DIR / "db.sqlite3"), DATABASE_PROFILE
+    ),
+}
+
+# Реплики для чтения каталога: "путь[=вес],..." (например,
+# "replica.sqlite3,replica2.sqlite3=2"). Копия для локальной проверки —
+# python manage.py sync_replicas
+_replicas, REPLICA_DATABASES = replica_databases(
+    os.environ.get("SHOPLIST_DB_REPLICAS", ""), DATABASE_PROFILE
+)
+DATABASES.update(_replicas)
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ["shoplist.routers.PrimaryReplicaRouter"]
+
+# Сколько секунд после записи клиент читает каталог из основной базы
+REPLICA_PIN_SECONDS = 5
+
+
+# -------------------------------------------------------------------
+# Кэш
+# -------------------------------------------------------------------
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shoplist",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Отдельный кэш сессий: фрагменты сетки не вытесняют сессии. Для
+    # SHOPLIST_SESSION_MODE=cached_db при нескольких процессах нужен общий
+    # бэкенд (Redis, Memcached): LocMemCache у каждого процесса свой
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shoplist-sessions",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
 }
 
+# Время жизни фрагмента сетки товаров, с (сброс — по версии каталога)
+PRODUCT_GRID_CACHE_TIMEOUT = 300
+
 
 # -------------------------------------------------------------------
 # Аутентификация
 # -------------------------------------------------------------------
+# Хранение сессий: "db", "cached_db" или "signed_cookies" (shoplist.sessions).
+# "cached_db" — только с общим для всех процессов кэшем CACHES["sessions"]
+SESSION_ENGINE = session_engine(os.environ.get("SHOPLIST_SESSION_MODE", "db"))
+SESSION_CACHE_ALIAS = "sessions"
+
+# Сколько секунд пользователь запроса берётся из памяти процесса
+# (products.auth_cache); 0 — отключить
+AUTH_USER_CACHE_SECONDS = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -123,12 +183,29 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Изображения товаров хранятся по хешу содержимого: одинаковые загрузки
+# занимают один файл, а URL файла никогда не меняется
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # Имена с хешем содержимого и сжатые копии .gz/.br (shoplist.staticfiles)
+    "staticfiles": {"BACKEND": "shoplist.staticfiles.CompressedManifestStaticFilesStorage"},
+    "product_images": {"BACKEND": "products.storage.HashedFileSystemStorage"},
+}
+
 
 # -------------------------------------------------------------------
 # Прочие настройки
 # -------------------------------------------------------------------
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Режим пагинации списка товаров: "page" (номера страниц) или "cursor"
+# (ссылки «Вперёд/Назад» по ключу, без COUNT(*) и OFFSET)
+PRODUCT_LIST_PAGINATION = "page"
+
+# Запросы дольше порога (мс) пишутся в лог вместе с самыми долгими SQL
+PERFORMANCE_SLOW_REQUEST_MS = 500
+PERFORMANCE_SLOW_QUERIES = 5
+
 # Перенаправления после логина и логаута
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/login/"
@@ -0,0 +1,202 @@
+"""Статика: имена с хешем содержимого, предварительное сжатие и раздача.
+
+``CompressedManifestStaticFilesStorage`` при ``collectstatic`` даёт
+файлам имена с хешем (``css/styles.3f9a….css``) и пишет рядом сжатые
+копии ``.gz`` и, если установлен пакет ``brotli``, ``.br``.
+
+``StaticFilesMiddleware`` отдаёт собранные файлы из ``STATIC_ROOT``
+без обращения к базе: выбирает сжатую копию по ``Accept-Encoding``,
+а файлам с хешем в имени ставит ``Cache-Control: immutable`` на год.
+Если перед приложением стоит веб-сервер, он может отдавать те же
+сжатые копии сам (``gzip_static``/``brotli_static`` в nginx).
+"""
+
+import gzip
+import mimetypes
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # сжатие brotli необязательно, gzip пишется всегда
+    brotli = None
+
+#: Расширения файлов, для которых пишутся сжатые копии.
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".map", ".txt", ".xml", ".html")
+
+#: Сжатые копии в порядке предпочтения: (кодировка, суффикс файла).
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Файлы без хеша в имени могут измениться при следующей выкладке
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def compress(data):
+    """Сжатые копии ``{суффикс: байты}``; копия сохраняется, только если меньше."""
+    copies = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies[".br"] = brotli.compress(data, quality=11)
+    # Копия, почти не меньшая оригинала, не стоит лишнего файла
+    return {suffix: copy for suffix, copy in copies.items() if len(copy) < len(data) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами имён и сжатые копии файлов, записанные при сборке."""
+
+    # Без манифеста (разработка, тесты) ссылки ведут на файлы без хеша
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic ещё не запускался: файла нет в STATIC_ROOT
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set()
+        for name in paths:
+            names.add(name)
+            hashed = self.hashed_files.get(self.hash_key(self.clean_name(name)))
+            if hashed:
+                names.add(hashed)
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+                continue
+            with self.open(name) as f:
+                data = f.read()
+            for suffix, copy in compress(data).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(copy))
+                yield name, name + suffix, True
+
+    def is_immutable(self, name):
+        """Есть ли у файла хеш в имени (имя из манифеста)."""
+        return name in self._immutable_names()
+
+    def _immutable_names(self):
+        if getattr(self, "_immutable", None) is None:
+            self._immutable = set(self.hashed_files.values())
+        return self._immutable
+
+
+def accepted_encodings(header):
+    """Кодировки из ``Accept-Encoding`` с ненулевым ``q``."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Отдаёт файлы из ``STATIC_ROOT`` со сжатием и долгим кэшем.
+
+    Ставится первой в ``MIDDLEWARE``: статике не нужны ни сессии, ни база.
+    Запросы к отсутствующим файлам передаются дальше по цепочке. Под ASGI
+    работает асинхронно: в поток уходит только чтение файла статики.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        name = self.static_name(request)
+        if name is not None:
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        name = self.static_name(request)
+        if name is not None:
+            response = await sync_to_async(self.serve)(request, name)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def static_name(self, request):
+        """Имя файла в ``STATIC_ROOT`` для запроса статики или ``None``."""
+        prefix = settings.STATIC_URL
+        if (
+            request.method in ("GET", "HEAD")
+            and prefix.startswith("/")
+            and settings.STATIC_ROOT
+            and request.path.startswith(prefix)
+        ):
+            return request.path[len(prefix):]
+        return None
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(name)
+        headers = {
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL
+                if getattr(staticfiles_storage, "is_immutable", lambda name: False)(name)
+                else REVALIDATE_CACHE_CONTROL
+            ),
+            "Last-Modified": http_date(stat.st_mtime),
+        }
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        compressed = [(coding, path + suffix) for coding, suffix in ENCODINGS]
+        if any(os.path.isfile(candidate) for _, candidate in compressed):
+            headers["Vary"] = "Accept-Encoding"
+        for coding, candidate in compressed:
+            if coding in accepted and os.path.isfile(candidate):
+                headers["Content-Encoding"] = coding
+                path = candidate
+                break
+
+        if request.method == "HEAD":
+            response = HttpResponse(content_type=content_type or "application/octet-stream")
+            response["Content-Length"] = os.path.getsize(path)
+        else:
+            response = FileResponse(
+                open(path, "rb"), content_type=content_type or "application/octet-stream"
+            )
+            # FileResponse добавляет имя сжатой копии — браузеру оно не нужно
+            response.headers.pop("Content-Disposition", None)
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,62 @@
+/* Бесконечная прокрутка списка товаров.
+ *
+ * Когда блок #load-more попадает в область видимости, следующая порция
+ * карточек запрашивается у /products/grid/ (только HTML карточек) и
+ * добавляется в #product-cards. Курсор следующей порции приходит в
+ * заголовке X-Next-Cursor. Без JavaScript работает обычная пагинация.
+ */
+(function () {
+    "use strict";
+
+    var sentinel = document.getElementById("load-more");
+    var cards = document.getElementById("product-cards");
+    if (!sentinel || !cards || !("IntersectionObserver" in window)) {
+        return;
+    }
+    document.querySelectorAll("[data-pagination]").forEach(function (element) {
+        element.hidden = true;
+    });
+
+    var url = new URL(sentinel.dataset.url, window.location.href);
+    var loading = false;
+
+    function finish(observer) {
+        observer.disconnect();
+        sentinel.remove();
+    }
+
+    var observer = new IntersectionObserver(function (entries) {
+        if (loading || !entries.some(function (entry) { return entry.isIntersecting; })) {
+            return;
+        }
+        loading = true;
+        sentinel.textContent = "Загрузка…";
+        fetch(url, { credentials: "same-origin", headers: { "Accept": "text/html" } })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                var cursor = response.headers.get("X-Next-Cursor");
+                return response.text().then(function (html) {
+                    cards.insertAdjacentHTML("beforeend", html);
+                    if (cursor) {
+                        url.searchParams.set("cursor", cursor);
+                        sentinel.textContent = "";
+                    } else {
+                        finish(observer);
+                    }
+                });
+            })
+            .catch(function () {
+                // Ошибка сети или сервера: возвращаем обычную пагинацию
+                finish(observer);
+                document.querySelectorAll("[data-pagination]").forEach(function (element) {
+                    element.hidden = false;
+                });
+            })
+            .finally(function () {
+                loading = false;
+            });
+    }, { rootMargin: "400px" });
+    observer.observe(sentinel);
+})();
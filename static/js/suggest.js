@@ -0,0 +1,59 @@
+/* Подсказки в поле поиска списка товаров.
+ *
+ * При вводе (с задержкой) запрашивает /products/api/suggest/?q=… и
+ * заполняет <datalist> названиями товаров и магазинов. Ответ приходит
+ * из индекса в памяти сервера, поэтому задержка короткая. Устаревшие
+ * ответы (пришедшие после более нового запроса) отбрасываются.
+ */
+(function () {
+    "use strict";
+
+    var input = document.querySelector("input[data-suggest-url]");
+    var list = input && document.getElementById(input.getAttribute("list"));
+    if (!input || !list || !window.fetch) {
+        return;
+    }
+
+    var timer = null;
+    var latest = 0;
+
+    function fill(data) {
+        list.replaceChildren();
+        data.products.concat(data.shops).forEach(function (item) {
+            var option = document.createElement("option");
+            option.value = item.name;
+            list.appendChild(option);
+        });
+    }
+
+    function load(query) {
+        var request = ++latest;
+        var url = new URL(input.dataset.suggestUrl, window.location.href);
+        url.searchParams.set("q", query);
+        fetch(url, { credentials: "same-origin", headers: { "Accept": "application/json" } })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                if (request === latest) {
+                    fill(data);
+                }
+            })
+            .catch(function () {
+                // Без подсказок поиск работает как обычно
+            });
+    }
+
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        var query = input.value.trim();
+        if (!query) {
+            list.replaceChildren();
+            return;
+        }
+        timer = setTimeout(function () { load(query); }, 150);
+    });
+})();